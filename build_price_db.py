@@ -1,13 +1,18 @@
 import os
+import sys
 import sqlite3
 import argparse
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 import time
 
 import pandas as pd
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Optional dependency for SFTP upload
 try:
@@ -15,6 +20,23 @@ try:
 except Exception:
     paramiko = None
 
+# Optional dependency: HTTP/2 client so concurrent TCBS fetches multiplex
+# over one connection instead of one TCP stream each
+try:
+    import httpx
+except Exception:
+    httpx = None
+
+# Optional dependency: faster JSON decode of TCBS payloads (orjson, then
+# ujson, then the stdlib via Response.json)
+try:
+    import orjson as _fastjson
+except Exception:
+    try:
+        import ujson as _fastjson
+    except Exception:
+        _fastjson = None
+
 DEFAULT_LOCAL_DB = "analysis_results.db"       # existing DB to copy from
 NEW_DB_PATH = "price_data.db"                  # new DB to build/store OHLCV
 TCBS_URL = "https://apipubaws.tcbs.com.vn/stock-insight/v1/stock/bars-long-term"
@@ -23,9 +45,121 @@ CHUNK = 500
 # NEW: lookback window used by median/ autoscaling helpers
 LOOKBACK_DAYS = 60
 
+# Shared HTTP session: keep-alive avoids a TCP+TLS handshake per ticker
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4, pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3),
+))
+_SESSION.headers.update({
+    "User-Agent": "ami2py/1.0",
+    "Accept": "application/json",
+})
+
+# Preferred HTTP/2 client when httpx is installed; _SESSION stays the fallback
+if httpx is not None:
+    _CLIENT = httpx.Client(
+        http2=True, timeout=15,
+        headers={"User-Agent": "ami2py/1.0", "Accept": "application/json"},
+        limits=httpx.Limits(max_connections=16),
+    )
+    _HTTP_ERRORS = (requests.RequestException, httpx.HTTPError)
+else:
+    _CLIENT = None
+    _HTTP_ERRORS = (requests.RequestException,)
+
+
+def _tune_conn(conn):
+    """Apply the bulk-work PRAGMAs (WAL + relaxed sync) to a connection."""
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-200000")
+        conn.execute("PRAGMA busy_timeout=5000")
+        # Memory-mapped reads skip the pager copy on SELECT-heavy work
+        # (scan_and_fix reads far more than it writes); mmap I/O is a
+        # known regression on Windows, so leave it off there.
+        if sys.platform != "win32":
+            conn.execute("PRAGMA mmap_size=268435456")
+    except Exception:
+        # pragmas are best-effort; old builds just run with defaults
+        pass
+    return conn
+
+
+def _connect(db_path):
+    """Open a SQLite connection tuned for bulk work."""
+    return _tune_conn(sqlite3.connect(db_path, check_same_thread=False))
+
+
+# Long-lived connections keyed by DB path, cached PER THREAD. Helpers that
+# used to open/close a connection per call (4+ times per ticker during API
+# updates) share these instead; PRAGMA state persists for the life of the
+# process. The cache must be per-thread: fetch_and_scale workers run
+# save_scale/_get_local_db_median while the main thread holds a staged
+# upsert transaction, and on a shared connection a worker's commit() would
+# land mid-transaction (or die with "SQL statements in progress").
+_CONN_CACHE = threading.local()
+_ALL_CONNS = []
+_ALL_CONNS_LOCK = threading.Lock()
+
+
+def _conn_map():
+    m = getattr(_CONN_CACHE, 'conns', None)
+    if m is None:
+        m = _CONN_CACHE.conns = {}
+    return m
+
+
+def _register(db_path, conn):
+    _conn_map()[db_path] = conn
+    with _ALL_CONNS_LOCK:
+        _ALL_CONNS.append(conn)
+    return conn
+
+
+def _conn(db_path):
+    """Return a thread-cached tuned connection for db_path (callers must not close)."""
+    c = _conn_map().get(db_path)
+    if c is None:
+        c = _register(db_path, _connect(db_path))
+    return c
+
+
+def _open_rw(db_path):
+    """Return a thread-cached connection to an EXISTING db, or None if it's missing.
+
+    URI mode=rw makes the open itself fail when the file doesn't exist, so
+    callers skip the os.path.exists stat (and its TOCTOU window) while still
+    never creating an empty database by accident.
+    """
+    c = _conn_map().get(db_path)
+    if c is not None:
+        return c
+    try:
+        c = _tune_conn(sqlite3.connect(f"file:{db_path}?mode=rw", uri=True,
+                                       check_same_thread=False))
+    except sqlite3.OperationalError:
+        return None
+    return _register(db_path, c)
+
+
+def close_cached_connections():
+    """Close every cached connection (end of CLI run / tests)."""
+    with _ALL_CONNS_LOCK:
+        conns = _ALL_CONNS[:]
+        del _ALL_CONNS[:]
+    for c in conns:
+        try:
+            c.close()
+        except Exception:
+            pass
+    _CONN_CACHE.conns = {}
+
 
 def create_db(db_path=NEW_DB_PATH):
-    conn = sqlite3.connect(db_path)
+    conn = _conn(db_path)
     cursor = conn.cursor()
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS price_data (
@@ -43,6 +177,11 @@ def create_db(db_path=NEW_DB_PATH):
         )
     """)
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_ticker_date ON price_data(ticker, date)")
+    # Composite indexes for the source-filtered paths (scan_and_fix,
+    # force_rescale_tcbs, remove_tcbs_data) so SQLite can seek on
+    # source + ticker/date instead of filtering after a single-column index.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_src_ticker_date ON price_data(source, ticker, date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_src_date ON price_data(source, date)")
     # NEW: table to remember TCBS scaling per ticker
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS tcbs_scaling (
@@ -54,60 +193,90 @@ def create_db(db_path=NEW_DB_PATH):
         )
     """)
     conn.commit()
-    conn.close()
+    # Refresh planner statistics so the new composite indexes get picked.
+    cursor.execute("ANALYZE")
     print(f"✅ Created/ensured schema in {db_path}")
 
 
 def copy_existing_market_data(source_db=DEFAULT_LOCAL_DB, target_db=NEW_DB_PATH, limit=None):
-    """Copy market_data from current analysis_results.db into new DB (initial load)."""
+    """Copy market_data from current analysis_results.db into new DB (initial load).
+    Runs entirely inside SQLite: the source DB is ATTACHed and one
+    INSERT .. SELECT performs the whole upsert, so no rows cross into Python."""
     if not os.path.exists(source_db):
         raise FileNotFoundError(f"Source DB not found: {source_db}")
     create_db(target_db)
-    src_conn = sqlite3.connect(source_db)
-    tgt_conn = sqlite3.connect(target_db)
-
-    # attempt to read available columns from source
-    query = "SELECT ticker, date, open, high, low, close, volume FROM market_data"
-    if limit:
-        query += f" LIMIT {limit}"
-    df = pd.read_sql_query(query, src_conn)
-    src_conn.close()
-    if df.empty:
-        print("No market_data rows found in source DB")
-        tgt_conn.close()
-        return 0
-
-    # Normalize columns
-    df.columns = [c.lower() for c in df.columns]
-    df = df.rename(columns={"date": "date"})
-    df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
-    df['source'] = 'local_copy'
-    df = df[['ticker', 'date', 'open', 'high', 'low', 'close', 'volume', 'source']]
-
-    # upsert in batches
+    tgt_conn = _connect(target_db)
     cursor = tgt_conn.cursor()
-    total = 0
-    insert_sql = """
-        INSERT OR REPLACE INTO price_data
-        (ticker, date, open, high, low, close, volume, source, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-    """
-    for start in range(0, len(df), CHUNK):
-        chunk = df.iloc[start:start + CHUNK]
-        params = [(
-            row.ticker, row.date, _safe(row.open), _safe(row.high),
-            _safe(row.low), _safe(row.close), int(_safe_int(row.volume)),
-            row.source
-        ) for row in chunk.itertuples()]
-        cursor.executemany(insert_sql, params)
+    cursor.execute("ATTACH DATABASE ? AS src", (source_db,))
+    try:
+        # drop the non-unique index during the load so it is built once at the
+        # end instead of being maintained row by row (UNIQUE stays for UPSERT)
+        cursor.execute("DROP INDEX IF EXISTS idx_price_ticker_date")
+        insert_sql = (
+            "INSERT INTO price_data (ticker, date, open, high, low, close, volume, source, updated_at) "
+            "SELECT ticker, strftime('%Y-%m-%d', date), open, high, low, close, "
+            "COALESCE(volume, 0), 'local_copy', CURRENT_TIMESTAMP "
+            "FROM src.market_data WHERE true "
+            + (f"LIMIT {int(limit)} " if limit else "")
+            + _UPSERT_CLAUSE
+        )
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(insert_sql)
+        total = cursor.execute("SELECT changes()").fetchone()[0]
         tgt_conn.commit()
-        total += len(params)
-        print(f"  ↳ Copied {total}/{len(df)}")
-    tgt_conn.close()
-    print(f"✅ Copied {total} rows into {target_db}")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_ticker_date ON price_data(ticker, date)")
+        tgt_conn.commit()
+    finally:
+        cursor.execute("DETACH DATABASE src")
+        tgt_conn.close()
+    if total == 0:
+        print("No market_data rows found in source DB")
+    else:
+        print(f"✅ Copied {total} rows into {target_db}")
     return total
 
 
+# Native UPSERT (SQLite 3.24+): updates conflicting rows in place instead of
+# INSERT OR REPLACE's delete+re-insert, which churns the indexes and rowids.
+_UPSERT_CLAUSE = (
+    " ON CONFLICT(ticker, date) DO UPDATE SET"
+    " open=excluded.open, high=excluded.high, low=excluded.low,"
+    " close=excluded.close, volume=excluded.volume, source=excluded.source,"
+    " updated_at=CURRENT_TIMESTAMP"
+)
+
+
+def _median(values):
+    """Median of a plain list of floats, skipping pandas Series overhead."""
+    return float(np.median(np.fromiter(values, dtype=np.float64, count=len(values))))
+
+
+# In-engine median via window functions: avoids shipping N closes per ticker
+# across the SQLite/Python boundary just to sort them again in Python.
+# {date_pred} is either a lookback expression or a plain placeholder.
+_SQL_MEDIAN_CLOSE = (
+    "WITH c AS ("
+    " SELECT close, ROW_NUMBER() OVER (ORDER BY close) AS rn,"
+    " COUNT(*) OVER () AS n"
+    " FROM {table} WHERE ticker = ? AND date >= {date_pred} AND close IS NOT NULL"
+    ") SELECT AVG(close) FROM c WHERE rn IN ((n + 1) / 2, (n + 2) / 2)"
+)
+
+
+def _coerce_price_columns(df):
+    """Coerce OHLC columns to float-or-None and volume to int64 in bulk.
+    One C-level pass per column instead of per-cell _safe/_safe_int calls."""
+    for col in ('open', 'high', 'low', 'close'):
+        if col not in df.columns:
+            df[col] = None
+    ohlc = df[['open', 'high', 'low', 'close']].apply(pd.to_numeric, errors='coerce')
+    df[['open', 'high', 'low', 'close']] = ohlc.astype(object).where(ohlc.notna(), None)
+    if 'volume' not in df.columns:
+        df['volume'] = 0
+    df['volume'] = pd.to_numeric(df['volume'], errors='coerce').fillna(0).astype('int64')
+    return df
+
+
 def _safe(x):
     try:
         if pd.isna(x):
@@ -129,6 +298,46 @@ def _safe_int(x):
         return 0
 
 
+def _bars_to_frame(data):
+    """Fast path for the known TCBS bar schema: fill typed NumPy arrays in a
+    single pass over the JSON list and build the DataFrame from those arrays,
+    instead of letting pandas traverse a list of dicts row by row.
+    Returns None when the payload doesn't match the expected shape."""
+    if not isinstance(data, list) or not data or not isinstance(data[0], dict):
+        return None
+    if 'tradingDate' not in data[0]:
+        return None
+    n = len(data)
+    o = np.empty(n)
+    h = np.empty(n)
+    lo = np.empty(n)
+    c = np.empty(n)
+    v = np.zeros(n, dtype='int64')
+    ts = []
+    try:
+        for i, row in enumerate(data):
+            ts.append(row['tradingDate'])
+            val = row.get('open')
+            o[i] = np.nan if val is None else val
+            val = row.get('high')
+            h[i] = np.nan if val is None else val
+            val = row.get('low')
+            lo[i] = np.nan if val is None else val
+            val = row.get('close')
+            c[i] = np.nan if val is None else val
+            val = row.get('volume')
+            if val is not None:
+                v[i] = val
+    except (TypeError, ValueError):
+        return None
+    if isinstance(ts[0], str):
+        dates = pd.to_datetime(ts, format='ISO8601', cache=True, errors='coerce')
+    else:
+        dates = pd.to_datetime(np.asarray(ts, dtype='int64'), unit='ms', errors='coerce')
+    return pd.DataFrame({'tradingDate': dates, 'open': o, 'high': h,
+                         'low': lo, 'close': c, 'volume': v})
+
+
 def fetch_historical_price(ticker: str, days: int = 365, resolution: str = "D", timeout=15) -> pd.DataFrame:
     """Fetch stock historical price and volume data from TCBS API.
     Returns DataFrame with columns: tradingDate(datetime), open, high, low, close, volume
@@ -144,47 +353,48 @@ def fetch_historical_price(ticker: str, days: int = 365, resolution: str = "D",
         "to": str(to_timestamp)
     }
 
-    headers = {
-        "User-Agent": "ami2py/1.0",
-        "Accept": "application/json"
-    }
-
     try:
-        r = requests.get(TCBS_URL, params=params, headers=headers, timeout=timeout)
+        if _CLIENT is not None:
+            r = _CLIENT.get(TCBS_URL, params=params)
+        else:
+            r = _SESSION.get(TCBS_URL, params=params, timeout=timeout)
         r.raise_for_status()
-        payload = r.json()
+        payload = _fastjson.loads(r.content) if _fastjson is not None else r.json()
         data = payload.get('data') or payload.get('bars') or payload
         if not data:
             print(f"⚠️ No data returned for {ticker}")
             return pd.DataFrame()
 
-        df = pd.DataFrame(data)
-        # Normalize trading date column
-        if 'tradingDate' in df.columns:
-            # tradingDate might be ISO string or epoch ms
-            sample = df['tradingDate'].iloc[0]
-            if isinstance(sample, str) and 'T' in sample:
-                df['tradingDate'] = pd.to_datetime(df['tradingDate'])
+        df = _bars_to_frame(data)
+        if df is None:
+            # generic fallback for unexpected payload shapes
+            df = pd.DataFrame(data)
+            # Normalize trading date column
+            if 'tradingDate' in df.columns:
+                # tradingDate might be ISO string or epoch ms
+                sample = df['tradingDate'].iloc[0]
+                if isinstance(sample, str) and 'T' in sample:
+                    df['tradingDate'] = pd.to_datetime(df['tradingDate'], format='ISO8601', cache=True)
+                else:
+                    df['tradingDate'] = pd.to_datetime(df['tradingDate'], unit='ms', errors='coerce')
             else:
-                df['tradingDate'] = pd.to_datetime(df['tradingDate'], unit='ms', errors='coerce')
-        else:
-            # try common columns
-            for col in ('datetime', 'timestamp', 'date'):
-                if col in df.columns:
-                    try:
-                        df['tradingDate'] = pd.to_datetime(df[col], unit='ms', errors='coerce') \
-                            if np.issubdtype(df[col].dtype, np.number) else pd.to_datetime(df[col], errors='coerce')
-                        break
-                    except Exception:
-                        continue
-
-        # keep relevant columns
-        cols_map = {}
-        for c in df.columns:
-            lc = c.lower()
-            if lc in ('open', 'high', 'low', 'close', 'volume'):
-                cols_map[c] = lc
-        df = df.rename(columns=cols_map)
+                # try common columns
+                for col in ('datetime', 'timestamp', 'date'):
+                    if col in df.columns:
+                        try:
+                            df['tradingDate'] = pd.to_datetime(df[col], unit='ms', errors='coerce') \
+                                if np.issubdtype(df[col].dtype, np.number) else pd.to_datetime(df[col], format='ISO8601', cache=True, errors='coerce')
+                            break
+                        except Exception:
+                            continue
+
+            # keep relevant columns
+            cols_map = {}
+            for c in df.columns:
+                lc = c.lower()
+                if lc in ('open', 'high', 'low', 'close', 'volume'):
+                    cols_map[c] = lc
+            df = df.rename(columns=cols_map)
         if 'tradingDate' not in df.columns:
             print(f"⚠️ No date column for {ticker} - skipping")
             return pd.DataFrame()
@@ -192,7 +402,7 @@ def fetch_historical_price(ticker: str, days: int = 365, resolution: str = "D",
         df = df.dropna(subset=['tradingDate'])
         df = df.sort_values('tradingDate').reset_index(drop=True)
         return df
-    except requests.RequestException as e:
+    except _HTTP_ERRORS as e:
         print(f"❌ HTTP error fetching {ticker}: {e}")
         return pd.DataFrame()
     except Exception as e:
@@ -204,45 +414,44 @@ def upsert_prices_from_df(df: pd.DataFrame, db_path=NEW_DB_PATH, ticker=None, so
     """Upsert normalized DataFrame into price_data table. df must have tradingDate, open, high, low, close, volume."""
     if df.empty:
         return 0
-    conn = sqlite3.connect(db_path)
+    conn = _conn(db_path)
     cursor = conn.cursor()
-    insert_sql = """
-        INSERT OR REPLACE INTO price_data
-        (ticker, date, open, high, low, close, volume, source, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-    """
-    df = df.copy()
-    if 'tradingDate' in df.columns:
-        df['date'] = pd.to_datetime(df['tradingDate']).dt.strftime('%Y-%m-%d')
-    elif 'date' in df.columns:
-        df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
-    else:
-        raise ValueError("DataFrame missing date/tradingDate column")
 
-    df['ticker'] = ticker if ticker else df.get('ticker', None)
-    if df['ticker'].isnull().any():
+    # Build a narrow staging frame directly — no full df.copy(), and no
+    # re-parse when the date column is already datetime64.
+    date_col = df['tradingDate'] if 'tradingDate' in df.columns else df.get('date')
+    if date_col is None:
+        raise ValueError("DataFrame missing date/tradingDate column")
+    if not pd.api.types.is_datetime64_any_dtype(date_col):
+        # ISO fast path + cache: dedupes repeated date strings, skips dateutil
+        date_col = pd.to_datetime(date_col, format='ISO8601', cache=True, errors='coerce')
+
+    stage = pd.DataFrame({
+        'ticker': ticker if ticker else df.get('ticker'),
+        'date': date_col.dt.strftime('%Y-%m-%d'),
+        'open': df.get('open'), 'high': df.get('high'),
+        'low': df.get('low'), 'close': df.get('close'),
+        'volume': df.get('volume'),
+    }, index=df.index)
+    if stage['ticker'].isnull().any():
         raise ValueError("Ticker not provided and not present in DataFrame")
 
-    rows = []
-    for row in df.itertuples(index=False):
-        rows.append((
-            row.ticker if hasattr(row, 'ticker') else ticker,
-            row.date,
-            _safe(getattr(row, 'open', None)),
-            _safe(getattr(row, 'high', None)),
-            _safe(getattr(row, 'low', None)),
-            _safe(getattr(row, 'close', None)),
-            _safe_int(getattr(row, 'volume', 0)),
-            source
-        ))
-    total = 0
-    for i in range(0, len(rows), CHUNK):
-        batch = rows[i:i+CHUNK]
-        cursor.executemany(insert_sql, batch)
-        conn.commit()
-        total += len(batch)
-        print(f"  ↳ Upserted {total}/{len(rows)}")
-    conn.close()
+    stage = _coerce_price_columns(stage)
+    stage['source'] = source
+
+    # Stage the frame via to_sql (C-level batching), then let SQLite do the
+    # upsert in one INSERT..SELECT — no Python tuple-building pass at all.
+    stage.to_sql('_stage_prices', conn, if_exists='replace', index=False,
+                 method='multi', chunksize=500)
+    cursor.execute(
+        "INSERT INTO price_data (ticker, date, open, high, low, close, volume, source, updated_at) "
+        "SELECT ticker, date, open, high, low, close, volume, source, CURRENT_TIMESTAMP "
+        "FROM _stage_prices WHERE true" + _UPSERT_CLAUSE
+    )
+    total = cursor.rowcount
+    cursor.execute("DROP TABLE _stage_prices")
+    conn.commit()
+    print(f"  ↳ Upserted {total} rows")
     return total
 
 
@@ -258,34 +467,34 @@ def _get_local_db_median(ticker, db_paths=None, lookback_days=LOOKBACK_DAYS):
         if not os.path.exists(db_path):
             continue
         try:
-            conn = sqlite3.connect(db_path)
-            cur = conn.cursor()
+            cur = _conn(db_path).cursor()
             # prefer market_data table if present, else price_data
             cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('market_data','price_data')")
             tables = [r[0] for r in cur.fetchall()]
             if 'market_data' in tables:
-                q = "SELECT close FROM market_data WHERE ticker = ? AND date >= date('now', ? || ' day')"
+                table = 'market_data'
             elif 'price_data' in tables:
-                q = "SELECT close FROM price_data WHERE ticker = ? AND date >= date('now', ? || ' day')"
+                table = 'price_data'
             else:
-                conn.close()
                 continue
+            q = _SQL_MEDIAN_CLOSE.format(table=table, date_pred="date('now', ? || ' day')")
             cur.execute(q, (ticker, f"-{lookback_days}"))
-            rows = [r[0] for r in cur.fetchall() if r[0] is not None]
-            conn.close()
-            if rows:
-                return float(pd.Series(rows).median())
+            row = cur.fetchone()
+            if row and row[0] is not None:
+                return float(row[0])
         except Exception:
             # ignore DB errors and try next DB
             continue
     return None
 
 
-def fetch_and_scale(ticker: str, days: int = 365, resolution: str = "D", timeout=15, db_path=NEW_DB_PATH) -> pd.DataFrame:
+def fetch_and_scale(ticker: str, days: int = 365, resolution: str = "D", timeout=15, db_path=NEW_DB_PATH, scale_cache=None) -> pd.DataFrame:
     """Fetch and auto-scale TCBS data for a ticker.
     If a saved scale exists in db_path.tcbs_scaling, apply it immediately.
     Otherwise detect autoscale and save the detected scale for future runs.
     If no local median is available, apply default 1000 when TCBS values are large (except VNINDEX).
+    `scale_cache` ({ticker: scale} from load_all_saved_scales) skips the
+    per-ticker SELECT when updating many tickers in one run.
     """
     df = fetch_historical_price(ticker, days=days, resolution=resolution, timeout=timeout)
     if df is None or df.empty:
@@ -296,16 +505,17 @@ def fetch_and_scale(ticker: str, days: int = 365, resolution: str = "D", timeout
     if t_up == "VNINDEX":
         return df
 
-    # 1) Check saved scale first
-    saved = get_saved_scale(t_up, db_path=db_path)
+    # 1) Check saved scale first (dict hit when a cache was preloaded)
+    if scale_cache is not None:
+        saved = scale_cache.get(t_up)
+    else:
+        saved = get_saved_scale(t_up, db_path=db_path)
     if saved:
         try:
-            applied_cols = []
-            for col in ('open','high','low','close'):
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce') / saved
-                    applied_cols.append(col)
-            print(f"[tcbs_api] Applied saved scale /{saved} for {ticker} (cols: {', '.join(applied_cols)})")
+            cols = [c for c in ('open', 'high', 'low', 'close') if c in df.columns]
+            # one vectorized divide over the contiguous float block
+            df[cols] = df[cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64) / float(saved)
+            print(f"[tcbs_api] Applied saved scale /{saved} for {ticker} (cols: {', '.join(cols)})")
         except Exception as e:
             print(f"[tcbs_api] Warning applying saved scale for {ticker}: {e}")
         return df
@@ -335,11 +545,12 @@ def fetch_and_scale(ticker: str, days: int = 365, resolution: str = "D", timeout
 
     if scale_to_apply:
         try:
-            for col in ('open','high','low','close'):
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce') / scale_to_apply
+            cols = [c for c in ('open', 'high', 'low', 'close') if c in df.columns]
+            df[cols] = df[cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64) / float(scale_to_apply)
             # persist detected scale for future runs
             save_scale(ticker, scale_to_apply, db_path=db_path, detected_by='autoscale', note=f"tcbs_median={tcbs_median}, db_median={db_median}")
+            if scale_cache is not None:
+                scale_cache[t_up] = scale_to_apply
             print(f"⚙️ Scaling {ticker} data by factor of {scale_to_apply} (TCBS median: {tcbs_median}, DB median: {db_median})")
         except Exception as e:
             print(f"⚠️ Error applying detected scale for {ticker}: {e}")
@@ -353,55 +564,88 @@ def get_saved_scale(ticker, db_path=NEW_DB_PATH):
     if not os.path.exists(db_path):
         return None
     try:
-        conn = sqlite3.connect(db_path)
-        cur = conn.cursor()
+        cur = _conn(db_path).cursor()
         cur.execute("SELECT scale FROM tcbs_scaling WHERE ticker = ?", (ticker.upper(),))
         row = cur.fetchone()
-        conn.close()
         return int(row[0]) if row and row[0] is not None else None
     except Exception:
         return None
 
+def load_all_saved_scales(db_path=NEW_DB_PATH):
+    """Return {ticker: scale} for every saved TCBS scale in one SELECT."""
+    if not os.path.exists(db_path):
+        return {}
+    try:
+        return {r[0]: int(r[1]) for r in _conn(db_path).execute(
+            "SELECT ticker, scale FROM tcbs_scaling WHERE scale IS NOT NULL")}
+    except Exception:
+        return {}
+
 def save_scale(ticker, scale, db_path=NEW_DB_PATH, detected_by='autoscale', note=None):
     """Insert or update scale for ticker."""
     try:
-        conn = sqlite3.connect(db_path)
-        cur = conn.cursor()
-        cur.execute("""
+        conn = _conn(db_path)
+        conn.execute("""
             INSERT INTO tcbs_scaling (ticker, scale, detected_by, detected_at, note)
             VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?)
             ON CONFLICT(ticker) DO UPDATE SET scale=excluded.scale, detected_by=excluded.detected_by, detected_at=excluded.detected_at, note=excluded.note
         """, (ticker.upper(), int(scale), detected_by, note))
         conn.commit()
-        conn.close()
         print(f"[tcbs_scaling] Saved scale {scale} for {ticker} in {db_path}")
     except Exception as e:
         print(f"[tcbs_scaling] Failed to save scale for {ticker}: {e}")
 
 
-def update_from_api(tickers, days=365, db_path=NEW_DB_PATH, source='tcbs'):
+# Concurrent TCBS fetches; requests releases the GIL during I/O, so a small
+# thread pool overlaps HTTP latency while upserts stay on the calling thread.
+FETCH_WORKERS = 8
+
+
+def update_from_api(tickers, days=365, db_path=NEW_DB_PATH, source='tcbs', max_workers=FETCH_WORKERS):
     """Fetch + upsert with autoscaling/default-scaling for TCBS data."""
     create_db(db_path)
     total = 0
-    for t in tickers:
-        print(f"🔎 Fetching {t} ({days} days)...")
-        # Pass db_path so fetched scale is read/saved in the correct DB
-        df = fetch_and_scale(t, days=days, db_path=db_path)
-        if df is None or df.empty:
-            print(f"  ⚠️ No data for {t}")
-            continue
-
-        upserted = upsert_prices_from_df(df.assign(ticker=t), db_path=db_path, ticker=t, source=source)
-        print(f"  ✅ {t}: upserted {upserted} rows")
-        total += upserted
-        time.sleep(0.5)
+    scale_cache = load_all_saved_scales(db_path)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_and_scale, t, days=days, db_path=db_path, scale_cache=scale_cache): t
+            for t in tickers
+        }
+        for fut in as_completed(futures):
+            t = futures[fut]
+            try:
+                df = fut.result()
+            except Exception as e:
+                print(f"  ❌ {t}: error {e}")
+                continue
+            if df is None or df.empty:
+                print(f"  ⚠️ No data for {t}")
+                continue
+            upserted = upsert_prices_from_df(df.assign(ticker=t), db_path=db_path, ticker=t, source=source)
+            print(f"  ✅ {t}: upserted {upserted} rows")
+            total += upserted
     print(f"✅ API update complete. Total rows upserted: {total}")
     return total
 
 
-def update_all_tickers_via_api(target_db=NEW_DB_PATH, source_db=DEFAULT_LOCAL_DB, days=365, pause=0.25, start_index=0):
+def _load_last_tcbs_dates(db_path):
+    """Return {ticker: latest tcbs date string} with one grouped SELECT."""
+    if not os.path.exists(db_path):
+        return {}
+    try:
+        cur = _conn(db_path).cursor()
+        cur.execute("SELECT ticker, MAX(date) FROM price_data WHERE source = 'tcbs' GROUP BY ticker")
+        return {r[0]: r[1] for r in cur.fetchall() if r[0]}
+    except Exception:
+        return {}
+
+
+def update_all_tickers_via_api(target_db=NEW_DB_PATH, source_db=DEFAULT_LOCAL_DB, days=365, pause=0.25, start_index=0, max_workers=FETCH_WORKERS):
     """
     Fetch historical prices for all tickers found in source_db and upsert into target_db.
+    Fetches run concurrently on a thread pool; upserts are serialized on the
+    calling thread (single SQLite writer). `pause` is kept for backward
+    compatibility but no longer used — the pool size is the throttle.
     Returns number of tickers processed.
     """
     tickers = _get_distinct_tickers_from_db(source_db)
@@ -413,31 +657,59 @@ def update_all_tickers_via_api(target_db=NEW_DB_PATH, source_db=DEFAULT_LOCAL_DB
     total = 0               # total rows upserted
     processed = 0           # tickers processed
     n = len(tickers)
-    print(f"Updating {n} tickers from {source_db} -> {target_db} (days={days})")
+    print(f"Updating {n} tickers from {source_db} -> {target_db} (days={days}, workers={max_workers})")
 
-    for idx, ticker in enumerate(tickers[start_index:], start=start_index+1):
-        try:
-            print(f"[{idx}/{n}] Fetching {ticker} ...")
-            # Use fetch_and_scale with target_db so scale is saved there
-            df = fetch_and_scale(ticker, days=days, db_path=target_db)
-            if df is None or df.empty:
-                print(f"[{idx}/{n}] {ticker}: no data")
-            else:
-                # ensure 'tradingDate' present
-                if 'tradingDate' not in df.columns and 'date' in df.columns:
-                    df = df.rename(columns={'date': 'tradingDate'})
-                upserted = upsert_prices_from_df(df.assign(ticker=ticker), db_path=target_db, ticker=ticker, source='tcbs')
-                print(f"[{idx}/{n}] {ticker}: upserted {upserted} rows")
-                total += upserted
-            processed += 1
-
-        except KeyboardInterrupt:
-            print("\nInterrupted by user")
-            break
-        except Exception as e:
-            print(f"[{idx}/{n}] {ticker}: error {e}")
+    scale_cache = load_all_saved_scales(target_db)
+
+    # Incremental refresh: don't re-download 365 days for tickers that are
+    # already current — skip them, and only request the gap for the rest.
+    last_dates = _load_last_tcbs_dates(target_db)
+    today = datetime.now()
+    today_str = today.strftime('%Y-%m-%d')
+    skipped = 0
 
-        time.sleep(pause)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {}
+        for idx, ticker in enumerate(tickers[start_index:], start=start_index + 1):
+            last = last_dates.get(ticker)
+            if last and last >= today_str:
+                skipped += 1
+                processed += 1
+                continue
+            days_needed = days
+            if last:
+                try:
+                    gap = (today - datetime.strptime(last, '%Y-%m-%d')).days
+                    days_needed = max(5, gap + 2)
+                except ValueError:
+                    pass
+            fut = executor.submit(fetch_and_scale, ticker, days=days_needed, db_path=target_db, scale_cache=scale_cache)
+            futures[fut] = (idx, ticker)
+        if skipped:
+            print(f"Skipped {skipped} tickers already current ({today_str})")
+        for fut in as_completed(futures):
+            idx, ticker = futures[fut]
+            try:
+                df = fut.result()
+                if df is None or df.empty:
+                    print(f"[{idx}/{n}] {ticker}: no data")
+                else:
+                    # ensure 'tradingDate' present
+                    if 'tradingDate' not in df.columns and 'date' in df.columns:
+                        df = df.rename(columns={'date': 'tradingDate'})
+                    upserted = upsert_prices_from_df(df.assign(ticker=ticker), db_path=target_db, ticker=ticker, source='tcbs')
+                    print(f"[{idx}/{n}] {ticker}: upserted {upserted} rows")
+                    total += upserted
+                processed += 1
+            except Exception as e:
+                print(f"[{idx}/{n}] {ticker}: error {e}")
+    except KeyboardInterrupt:
+        print("\nInterrupted by user")
+        for fut in futures:
+            fut.cancel()
+    finally:
+        executor.shutdown(wait=False)
     print(f"Finished updating {processed} tickers; {total} rows upserted.")
     return processed
 
@@ -469,13 +741,13 @@ def _get_distinct_tickers_from_db(source_db, debug=False):
         tickers = []
         
         if 'market_data' in tables:
-            cursor.execute("SELECT DISTINCT ticker FROM market_data")
-            tickers = [r[0] for r in cursor.fetchall() if r[0]]
+            cursor.execute("SELECT DISTINCT ticker FROM market_data WHERE ticker IS NOT NULL")
+            tickers = [r[0] for r in cursor]
             if debug:
                 print(f"[DEBUG] Found {len(tickers)} tickers in market_data table")
         elif 'price_data' in tables:
-            cursor.execute("SELECT DISTINCT ticker FROM price_data")
-            tickers = [r[0] for r in cursor.fetchall() if r[0]]
+            cursor.execute("SELECT DISTINCT ticker FROM price_data WHERE ticker IS NOT NULL")
+            tickers = [r[0] for r in cursor]
             if debug:
                 print(f"[DEBUG] Found {len(tickers)} tickers in price_data table")
         else:
@@ -489,8 +761,8 @@ def _get_distinct_tickers_from_db(source_db, debug=False):
                     if debug:
                         print(f"[DEBUG] Table {tbl} has columns: {cols}")
                     if 'ticker' in cols:
-                        cursor.execute(f"SELECT DISTINCT ticker FROM {tbl}")
-                        tickers = [r[0] for r in cursor.fetchall() if r[0]]
+                        cursor.execute(f"SELECT DISTINCT ticker FROM {tbl} WHERE ticker IS NOT NULL")
+                        tickers = [r[0] for r in cursor]
                         if debug:
                             print(f"[DEBUG] Found {len(tickers)} tickers in table {tbl}")
                         if tickers:
@@ -511,11 +783,11 @@ def _get_distinct_tickers_from_db(source_db, debug=False):
                 cur2.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('market_data','price_data')")
                 tables2 = [r[0] for r in cur2.fetchall()]
                 if 'market_data' in tables2:
-                    cur2.execute("SELECT DISTINCT ticker FROM market_data")
-                    tickers = [r[0] for r in cur2.fetchall() if r[0]]
+                    cur2.execute("SELECT DISTINCT ticker FROM market_data WHERE ticker IS NOT NULL")
+                    tickers = [r[0] for r in cur2]
                 elif 'price_data' in tables2:
-                    cur2.execute("SELECT DISTINCT ticker FROM price_data")
-                    tickers = [r[0] for r in cur2.fetchall() if r[0]]
+                    cur2.execute("SELECT DISTINCT ticker FROM price_data WHERE ticker IS NOT NULL")
+                    tickers = [r[0] for r in cur2]
                 conn2.close()
                 if tickers and debug:
                     print(f"[DEBUG] Fallback: loaded {len(tickers)} tickers from {DEFAULT_LOCAL_DB}")
@@ -542,18 +814,16 @@ def _get_recent_median_from_db(db_path, table, ticker, lookback_days=LOOKBACK_DA
 	if not os.path.exists(db_path):
 		return None
 	try:
-		conn = sqlite3.connect(db_path)
-		cur = conn.cursor()
+		cur = _conn(db_path).cursor()
 		if since_date:
-			q = f"SELECT close FROM {table} WHERE ticker = ? AND date >= ?"
+			q = _SQL_MEDIAN_CLOSE.format(table=table, date_pred="?")
 			cur.execute(q, (ticker, since_date))
 		else:
-			q = f"SELECT close FROM {table} WHERE ticker = ? AND date >= date('now', ? || ' day')"
+			q = _SQL_MEDIAN_CLOSE.format(table=table, date_pred="date('now', ? || ' day')")
 			cur.execute(q, (ticker, f"-{lookback_days}"))
-		rows = [r[0] for r in cur.fetchall() if r[0] is not None]
-		conn.close()
-		if rows:
-			return float(pd.Series(rows).median())
+		row = cur.fetchone()
+		if row and row[0] is not None:
+			return float(row[0])
 	except Exception:
 		return None
 	return None
@@ -584,7 +854,8 @@ def _detect_scale(price_median, ref_median):
     
     return None, None
 
-def scan_and_fix(db_path="price_data.db", ref_db="analysis_results.db", dry_run=True, since_date=None):
+def scan_and_fix(db_path="price_data.db", ref_db="analysis_results.db", dry_run=True, since_date=None,
+                 chunk_size=None, verbose=True):
     """
     Scan price_data.db for tickers whose most recent close (tcbs source) appears scaled relative to local/reference data.
     Only compares when TCBS and local data have overlapping or very recent dates (within 7 days tolerance).
@@ -603,28 +874,65 @@ def scan_and_fix(db_path="price_data.db", ref_db="analysis_results.db", dry_run=
         print(f"Price DB not found: {db_path}")
         return fixes
 
-    conn = sqlite3.connect(db_path)
+    conn = _conn(db_path)
     cur = conn.cursor()
-    cur.execute("SELECT DISTINCT ticker FROM price_data")
-    tickers = [r[0] for r in cur.fetchall() if r[0]]
-    print(f"Found {len(tickers)} tickers in {db_path}")
+
+    # One window query yields the latest close per (ticker, tcbs/other)
+    # bucket — replaces the two per-ticker SELECTs of the old loop.
+    cur.execute("""
+        SELECT ticker, src, close, date FROM (
+            SELECT ticker,
+                   CASE WHEN source = 'tcbs' THEN 'tcbs' ELSE 'other' END AS src,
+                   close, date,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY ticker, CASE WHEN source = 'tcbs' THEN 'tcbs' ELSE 'other' END
+                       ORDER BY date DESC) AS rn
+            FROM price_data WHERE ticker IS NOT NULL
+        ) WHERE rn = 1
+    """)
+    latest = {}
+    for ticker, src, close, date_str in cur:
+        latest.setdefault(ticker, {})[src] = (close, date_str)
+    print(f"Found {len(latest)} tickers in {db_path}")
+
+    # Pull the latest ref close per ticker in one ATTACHed window query
+    # instead of opening a connection to ref_db per scanned ticker.
+    ref_latest = {}
+    if os.path.exists(ref_db):
+        try:
+            cur.execute("ATTACH DATABASE ? AS ref", (ref_db,))
+            try:
+                cur.execute("""
+                    SELECT ticker, close, date FROM (
+                        SELECT ticker, close, date,
+                               ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC) AS rn
+                        FROM ref.market_data WHERE close IS NOT NULL
+                    ) WHERE rn = 1
+                """)
+                ref_latest = {r[0]: (r[1], r[2]) for r in cur.fetchall()}
+            finally:
+                cur.execute("DETACH DATABASE ref")
+        except Exception:
+            ref_latest = {}
 
     DATE_TOLERANCE_DAYS = 7  # allow up to 7 days difference for "overlapping"
 
-    for t in tickers:
-        # Get LATEST close from TCBS source
-        cur.execute("SELECT close, date FROM price_data WHERE ticker = ? AND source = 'tcbs' ORDER BY date DESC LIMIT 1", (t,))
-        tcbs_row = cur.fetchone()
+    # Per-ticker diagnostics buffer into one stdout write at the end
+    # (a print per ticker is a syscall per ticker on 1000+ ticker scans).
+    log_lines = []
+    log = log_lines.append if verbose else (lambda line: None)
+
+    for t, buckets in latest.items():
+        tcbs_row = buckets.get('tcbs')
         if not tcbs_row or tcbs_row[0] is None:
             continue
         tcbs_latest_close = float(tcbs_row[0])
         tcbs_latest_date_str = tcbs_row[1]
-        tcbs_latest_date = pd.to_datetime(tcbs_latest_date_str).date()
+        tcbs_latest_date = pd.to_datetime(tcbs_latest_date_str, format='%Y-%m-%d').date()
+
+        # Latest close from NON-TCBS sources (local_copy, amibroker, etc.)
+        local_row = buckets.get('other')
 
-        # Get LATEST close from NON-TCBS source (local_copy, amibroker, etc.)
-        cur.execute("SELECT close, date FROM price_data WHERE ticker = ? AND source != 'tcbs' ORDER BY date DESC LIMIT 1", (t,))
-        local_row = cur.fetchone()
-        
         ref_close = None
         ref_date = None
         comparison_method = None
@@ -632,7 +940,7 @@ def scan_and_fix(db_path="price_data.db", ref_db="analysis_results.db", dry_run=
         if local_row and local_row[0] is not None:
             local_close = float(local_row[0])
             local_date_str = local_row[1]
-            local_date = pd.to_datetime(local_date_str).date()
+            local_date = pd.to_datetime(local_date_str, format='%Y-%m-%d').date()
             
             # Check if dates are close enough (within tolerance)
             date_diff_days = abs((tcbs_latest_date - local_date).days)
@@ -642,43 +950,35 @@ def scan_and_fix(db_path="price_data.db", ref_db="analysis_results.db", dry_run=
                 ref_close = local_close
                 ref_date = local_date
                 comparison_method = "latest_close"
-                print(f"[scan_and_fix] {t}: tcbs_latest={tcbs_latest_close:.2f} ({tcbs_latest_date_str}), local_latest={local_close:.2f} ({local_date_str}), date_diff={date_diff_days} days")
+                log(f"[scan_and_fix] {t}: tcbs_latest={tcbs_latest_close:.2f} ({tcbs_latest_date_str}), local_latest={local_close:.2f} ({local_date_str}), date_diff={date_diff_days} days")
             else:
                 # Dates don't overlap — fall back to median-based comparison over recent window
-                print(f"[scan_and_fix] {t}: dates don't overlap (tcbs={tcbs_latest_date_str}, local={local_date_str}, diff={date_diff_days} days). Using median fallback.")
+                log(f"[scan_and_fix] {t}: dates don't overlap (tcbs={tcbs_latest_date_str}, local={local_date_str}, diff={date_diff_days} days). Using median fallback.")
                 # Compute TCBS median over last LOOKBACK_DAYS
-                cur.execute("SELECT close FROM price_data WHERE ticker = ? AND source = 'tcbs' AND date >= date('now', ? || ' day')", (t, f"-{60}"))
-                tcbs_closes = [r[0] for r in cur.fetchall() if r[0] is not None]
-                tcbs_median = float(pd.Series(tcbs_closes).median()) if tcbs_closes else None
+                cur.execute("SELECT close FROM price_data WHERE ticker = ? AND source = 'tcbs' AND date >= date('now', ? || ' day') AND close IS NOT NULL", (t, f"-{60}"))
+                tcbs_closes = [r[0] for r in cur.fetchall()]
+                tcbs_median = _median(tcbs_closes) if tcbs_closes else None
                 
                 # Compute local median over last LOOKBACK_DAYS
-                cur.execute("SELECT close FROM price_data WHERE ticker = ? AND source != 'tcbs' AND date >= date('now', ? || ' day')", (t, f"-{60}"))
-                local_closes = [r[0] for r in cur.fetchall() if r[0] is not None]
-                local_median = float(pd.Series(local_closes).median()) if local_closes else None
+                cur.execute("SELECT close FROM price_data WHERE ticker = ? AND source != 'tcbs' AND date >= date('now', ? || ' day') AND close IS NOT NULL", (t, f"-{60}"))
+                local_closes = [r[0] for r in cur.fetchall()]
+                local_median = _median(local_closes) if local_closes else None
                 
                 if tcbs_median and local_median and local_median > 0:
                     ref_close = local_median
                     tcbs_latest_close = tcbs_median  # use median for comparison
                     comparison_method = "median_fallback"
-                    print(f"[scan_and_fix] {t}: tcbs_median={tcbs_median:.2f}, local_median={local_median:.2f}")
+                    log(f"[scan_and_fix] {t}: tcbs_median={tcbs_median:.2f}, local_median={local_median:.2f}")
                 else:
                     ref_close = None
         
         # If still no local reference, try external ref_db (market_data)
         if ref_close is None:
-            if os.path.exists(ref_db):
-                try:
-                    conn_ref = sqlite3.connect(ref_db)
-                    cur_ref = conn_ref.cursor()
-                    cur_ref.execute("SELECT close, date FROM market_data WHERE ticker = ? ORDER BY date DESC LIMIT 1", (t,))
-                    ref_row = cur_ref.fetchone()
-                    if ref_row and ref_row[0] is not None:
-                        ref_close = float(ref_row[0])
-                        ref_date = pd.to_datetime(ref_row[1]).date()
-                        comparison_method = "ref_db_latest"
-                    conn_ref.close()
-                except Exception:
-                    pass
+            ref_row = ref_latest.get(t)
+            if ref_row and ref_row[0] is not None:
+                ref_close = float(ref_row[0])
+                ref_date = pd.to_datetime(ref_row[1], format='%Y-%m-%d').date()
+                comparison_method = "ref_db_latest"
         
         if ref_close is None or ref_close <= 0:
             continue
@@ -688,48 +988,109 @@ def scan_and_fix(db_path="price_data.db", ref_db="analysis_results.db", dry_run=
         
         if scale and operation:
             fixes.append((t, tcbs_latest_close, ref_close, scale, operation, comparison_method))
-            print(f"Ticker {t}: tcbs_close={tcbs_latest_close:.2f}, ref_close={ref_close:.2f}, detected scale={scale}, operation={operation} (method={comparison_method})")
-            if not dry_run:
-                # Apply fix to ALL TCBS rows for this ticker
-                if operation == 'divide':
-                    scale_sql = """
-                        UPDATE price_data
-                        SET open = CASE WHEN open IS NOT NULL THEN open / ? ELSE NULL END,
-                            high = CASE WHEN high IS NOT NULL THEN high / ? ELSE NULL END,
-                            low = CASE WHEN low IS NOT NULL THEN low / ? ELSE NULL END,
-                            close = CASE WHEN close IS NOT NULL THEN close / ? ELSE NULL END,
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE ticker = ? {date_filter} AND source = 'tcbs'
-                    """
-                else:  # multiply
-                    scale_sql = """
-                        UPDATE price_data
-                        SET open = CASE WHEN open IS NOT NULL THEN open * ? ELSE NULL END,
-                            high = CASE WHEN high IS NOT NULL THEN high * ? ELSE NULL END,
-                            low = CASE WHEN low IS NOT NULL THEN low * ? ELSE NULL END,
-                            close = CASE WHEN close IS NOT NULL THEN close * ? ELSE NULL END,
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE ticker = ? {date_filter} AND source = 'tcbs'
-                    """
-                
-                if since_date:
-                    date_filter = "AND date >= ?"
-                    print(f"  Applying {operation} by {scale} to tcbs rows on/after {since_date} for {t}")
-                    cur.execute(scale_sql.format(date_filter=date_filter), (scale, scale, scale, scale, t, since_date))
-                else:
-                    date_filter = ""
-                    print(f"  Applying {operation} by {scale} to ALL tcbs rows for {t}")
-                    cur.execute(scale_sql.format(date_filter=date_filter), (scale, scale, scale, scale, t))
-                conn.commit()
+            log(f"Ticker {t}: tcbs_close={tcbs_latest_close:.2f}, ref_close={ref_close:.2f}, detected scale={scale}, operation={operation} (method={comparison_method})")
+
+    if log_lines:
+        print("\n".join(log_lines))
+
+    if fixes and not dry_run:
+        _apply_scale_fixes(conn, fixes, since_date=since_date, chunk_size=chunk_size)
 
-    conn.close()
     print(f"Scan complete. {len(fixes)} tickers flagged. Dry run: {dry_run}")
-    if fixes:
+    if fixes and verbose:
         print("Flagged tickers summary (ticker, tcbs_close, ref_close, scale, operation, method):")
-        for f in fixes:
-            print(f)
+        print("\n".join(str(f) for f in fixes))
     return fixes
 
+# Cap on tickers per batched UPDATE; keeps us well under
+# SQLITE_MAX_VARIABLE_NUMBER and, more importantly, keeps planner cost
+# linear — very long IN-lists degrade super-linearly. Overridable via
+# --fix-chunk-size on the CLI.
+FIX_CHUNK_SIZE = 200
+
+# Statement templates for _apply_scale_fixes. Keeping these module-level
+# (rather than rebuilding f-strings inline) means every full-sized chunk
+# produces a byte-identical SQL string, so sqlite3's per-connection
+# statement cache reuses the prepared plan across chunks and calls.
+# NULL propagates through SQLite arithmetic (NULL * x = NULL), so no
+# per-column CASE guards are needed here.
+_FIX_SQL = (
+    "UPDATE price_data SET "
+    "open = open {expr} ?, "
+    "high = high {expr} ?, "
+    "low = low {expr} ?, "
+    "close = close {expr} ?, "
+    "updated_at = ? "
+    "WHERE source = 'tcbs' AND ticker IN ({placeholders})"
+)
+_FIX_SQL_DATE_FILTER = " AND date >= ?"
+
+
+def _now_stamp():
+    """One pre-bound timestamp per batch, in CURRENT_TIMESTAMP's format.
+
+    Binding this as a parameter saves SQLite a CURRENT_TIMESTAMP function
+    call on every updated row of a bulk statement.
+    """
+    return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+def _fill_tmp_tickers(cur, tickers):
+    """(Re)create the session temp table tmp_tickers and load `tickers`.
+
+    Filtering via `ticker IN (SELECT t FROM tmp_tickers)` keeps the outer
+    statement text identical for any ticker count, so one cached plan
+    serves every call and no placeholder limit applies.
+    """
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS tmp_tickers(t TEXT PRIMARY KEY)")
+    cur.execute("DELETE FROM tmp_tickers")
+    cur.executemany("INSERT OR IGNORE INTO tmp_tickers VALUES (?)",
+                    [(t,) for t in tickers])
+
+
+def _apply_scale_fixes(conn, fixes, since_date=None, chunk_size=None):
+    """Apply all detected scale fixes with one batched UPDATE per
+    (scale, operation) bucket, inside a single transaction.
+    Tickers sharing a multiplier go into one IN-list (chunked at
+    chunk_size, default FIX_CHUNK_SIZE), so N flagged tickers cost a
+    handful of statements and exactly one COMMIT (one fsync) instead of N.
+    The chunk cap exists because batched-update planner cost grows
+    super-linearly with very long IN-lists; a few hundred tickers per
+    statement keeps it linear in total rows. On any failure the whole
+    batch rolls back, leaving either all fixes applied or none.
+    `fixes` rows are (ticker, tcbs_close, ref_close, scale, operation, method).
+    """
+    chunk_size = chunk_size or FIX_CHUNK_SIZE
+    buckets = {}
+    for f in fixes:
+        buckets.setdefault((f[3], f[4]), []).append(f[0])
+
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        now = _now_stamp()
+        date_filter = _FIX_SQL_DATE_FILTER if since_date else ""
+        for (scale, op), tickers in buckets.items():
+            expr = '/' if op == 'divide' else '*'
+            affected = 0
+            for i in range(0, len(tickers), chunk_size):
+                chunk = tickers[i:i + chunk_size]
+                sql = _FIX_SQL.format(
+                    expr=expr,
+                    placeholders=",".join("?" for _ in chunk),
+                ) + date_filter
+                params = [scale, scale, scale, scale, now] + chunk
+                if since_date:
+                    params.append(since_date)
+                cur.execute(sql, params)
+                affected += cur.rowcount
+            print(f"  Applied {op} by {scale} to {affected} tcbs rows for {len(tickers)} tickers"
+                  + (f" on/after {since_date}" if since_date else ""))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
 def force_rescale_tcbs(db_path="price_data.db", scale=1000, since_date=None, tickers=None):
     """
     Force-rescale all TCBS data by dividing OHLC by a fixed scale factor.
@@ -737,53 +1098,51 @@ def force_rescale_tcbs(db_path="price_data.db", scale=1000, since_date=None, tic
     Optionally restrict to specific tickers and/or since_date.
     Returns number of rows updated.
     """
-    if not os.path.exists(db_path):
+    conn = _open_rw(db_path)
+    if conn is None:
         print(f"Price DB not found: {db_path}")
         return 0
-    
-    conn = sqlite3.connect(db_path)
     cur = conn.cursor()
-    
-    # Build WHERE clause
-    where_parts = ["source = 'tcbs'"]
-    params = []
-    if tickers:
-        tickers_list = [t.strip().upper() for t in tickers if t.strip()]
-        where_parts.append(f"ticker IN ({','.join('?' for _ in tickers_list)})")
-        params.extend(tickers_list)
+
+    tickers_list = [t.strip().upper() for t in tickers if t.strip()] if tickers else None
+
+    print(f"Force-rescaling TCBS rows by dividing OHLC by {scale}...")
+
+    # Apply rescale; cur.rowcount afterwards tells us how many rows matched,
+    # so no separate COUNT(*) pass over the same predicate is needed.
+    # NULL columns stay NULL: SQLite arithmetic propagates NULL, so the
+    # per-column CASE guards the old version carried were redundant.
+    # The ticker restriction goes through a temp table rather than inline
+    # placeholders, so the statement text (and its cached plan) is identical
+    # for any ticker count and there is no SQLITE_MAX_VARIABLE_NUMBER limit.
+    update_sql = (
+        "UPDATE price_data "
+        "SET open = open / ?, high = high / ?, low = low / ?, close = close / ?, "
+        "updated_at = ? "
+        "WHERE source = 'tcbs'"
+        + (" AND ticker IN (SELECT t FROM tmp_tickers)" if tickers_list else "")
+        + (" AND date >= ?" if since_date else "")
+    )
+    params = [scale, scale, scale, scale, _now_stamp()]
     if since_date:
-        where_parts.append("date >= ?")
         params.append(since_date)
-    
-    where_clause = " AND ".join(where_parts)
-    
-    # Count affected rows first
-    count_sql = f"SELECT COUNT(*) FROM price_data WHERE {where_clause}"
-    cur.execute(count_sql, params)
-    count = cur.fetchone()[0]
-    
-    if count == 0:
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        if tickers_list:
+            _fill_tmp_tickers(cur, tickers_list)
+        cur.execute(update_sql, params)
+        affected = cur.rowcount
+        if tickers_list:
+            cur.execute("DROP TABLE tmp_tickers")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if affected == 0:
         print("No TCBS rows match the criteria.")
-        conn.close()
         return 0
-    
-    print(f"Force-rescaling {count} TCBS rows by dividing OHLC by {scale}...")
-    
-    # Apply rescale
-    update_sql = f"""
-        UPDATE price_data
-        SET open = CASE WHEN open IS NOT NULL THEN open / ? ELSE NULL END,
-            high = CASE WHEN high IS NOT NULL THEN high / ? ELSE NULL END,
-            low = CASE WHEN low IS NOT NULL THEN low / ? ELSE NULL END,
-            close = CASE WHEN close IS NOT NULL THEN close / ? ELSE NULL END,
-            updated_at = CURRENT_TIMESTAMP
-        WHERE {where_clause}
-    """
-    cur.execute(update_sql, [scale, scale, scale, scale] + params)
-    affected = cur.rowcount
-    conn.commit()
-    conn.close()
-    
+
     print(f"Force-rescaled {affected} TCBS rows.")
     return affected
 
@@ -793,30 +1152,53 @@ def remove_tcbs_data(db_path="price_data.db", since_date=None, tickers=None):
     Remove all rows from price_data where source='tcbs'.
     Optionally restrict to tickers and/or since_date.
     """
-    if not os.path.exists(db_path):
+    conn = _open_rw(db_path)
+    if conn is None:
         print(f"Price DB not found: {db_path}")
         return 0
-
-    conn = sqlite3.connect(db_path)
     cur = conn.cursor()
-    base_sql = "DELETE FROM price_data WHERE source = 'tcbs'"
-    params = []
-    if tickers:
-        tickers = [t.strip().upper() for t in tickers if t.strip()]
-        base_sql += " AND ticker IN ({})".format(",".join("?" for _ in tickers))
-        params.extend(tickers)
-    if since_date:
-        base_sql += " AND date >= ?"
-        params.append(since_date)
-    print(f"Executing: {base_sql} with params {params}")
-    cur.execute(base_sql, params)
-    affected = cur.rowcount
-    conn.commit()
-    conn.close()
+    tickers_list = [t.strip().upper() for t in tickers if t.strip()] if tickers else None
+    print(f"Removing tcbs rows (tickers={len(tickers_list) if tickers_list else 'all'}, since={since_date})")
+    sql = ("DELETE FROM price_data WHERE source = 'tcbs'"
+           + (" AND ticker IN (SELECT t FROM tmp_tickers)" if tickers_list else "")
+           + (" AND date >= ?" if since_date else ""))
+    params = [since_date] if since_date else []
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        if tickers_list:
+            _fill_tmp_tickers(cur, tickers_list)
+        cur.execute(sql, params)
+        affected = cur.rowcount
+        if tickers_list:
+            cur.execute("DROP TABLE tmp_tickers")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     print(f"Removed {affected} tcbs rows from price_data.")
     return affected
 
 
+def _autoclean(target_db, args):
+    """Run the unit-inconsistency cleaner once after a data update.
+
+    scan_and_fix both detects and (when --apply-clean is set) applies in
+    the same pass/transaction, so there is no separate dry-run scan
+    followed by a second full re-scan to apply.
+    """
+    dry_run = not args.apply_clean
+    print("Autoclean requested: running cleaning scan now...")
+    fixes = scan_and_fix(db_path=target_db, ref_db=args.clean_ref_db, dry_run=dry_run,
+                         chunk_size=args.fix_chunk_size)
+    if not fixes:
+        print("No unit inconsistency detected.")
+    elif dry_run:
+        print(f"Detected {len(fixes)} fixable tickers. Run with --apply-clean to apply the fixes.")
+    else:
+        print(f"Applied fixes for {len(fixes)} tickers.")
+    return fixes
+
+
 def main():
     parser = argparse.ArgumentParser(description="Build / update price_data SQLite DB from API and CSVs")
     parser.add_argument("--create", action="store_true", help="Create new DB schema")
@@ -847,6 +1229,8 @@ def main():
                         help="Run the cleaner immediately and exit (alias for --clean-price-units)")
     parser.add_argument("--fix-from-date", type=str, default=None,
                         help="When running cleaner, only inspect and (optionally) fix rows on/after this date (YYYY-MM-DD)")
+    parser.add_argument("--fix-chunk-size", type=int, default=FIX_CHUNK_SIZE,
+                        help=f"Tickers per batched fix UPDATE (default: {FIX_CHUNK_SIZE})")
     parser.add_argument("--remove-tcbs", action="store_true",
                         help="Remove all rows from price_data where source='tcbs'")
     parser.add_argument("--remove-tcbs-since", type=str, default=None,
@@ -877,7 +1261,8 @@ def main():
         dry_run = not args.apply_clean
         print("Running price unit scan on target DB:", target_db)
         print(f"Dry run: {dry_run}. Reference DB: {args.clean_ref_db}. Since date: {args.fix_from_date}")
-        fixes = scan_and_fix(db_path=target_db, ref_db=args.clean_ref_db, dry_run=dry_run, since_date=args.fix_from_date)
+        fixes = scan_and_fix(db_path=target_db, ref_db=args.clean_ref_db, dry_run=dry_run,
+                             since_date=args.fix_from_date, chunk_size=args.fix_chunk_size)
         if fixes and not dry_run:
             print(f"Applied fixes for {len(fixes)} tickers.")
         elif fixes:
@@ -916,11 +1301,7 @@ def main():
         # done with update-api processing
         # after update-api we may want to run cleaning if autoclean requested
         if args.autoclean and data_changed:
-            print("Autoclean requested: running dry-run cleaning now...")
-            fixes = scan_and_fix(db_path=target_db, ref_db=args.clean_ref_db, dry_run=True)
-            if fixes and args.apply_clean:
-                print("Applying fixes as requested...")
-                scan_and_fix(db_path=target_db, ref_db=args.clean_ref_db, dry_run=False)
+            _autoclean(target_db, args)
         return
 
     if args.update_all_api:
@@ -933,9 +1314,7 @@ def main():
         if processed:
             data_changed = True
         if args.autoclean and data_changed:
-            fixes = scan_and_fix(db_path=target_db, ref_db=args.clean_ref_db, dry_run=True)
-            if fixes and args.apply_clean:
-                scan_and_fix(db_path=target_db, ref_db=args.clean_ref_db, dry_run=False)
+            _autoclean(target_db, args)
         return
 
     # SAFELY handle optional update_csv flag (avoid AttributeError)
@@ -946,17 +1325,7 @@ def main():
 
     # After any manual update operations (copy, api, csv), if autoclean requested run the cleaner
     if args.autoclean and data_changed:
-        print("Autoclean requested: running dry-run cleaning now...")
-        fixes = scan_and_fix(db_path=target_db, ref_db=args.clean_ref_db, dry_run=True)
-        if fixes:
-            print(f"Detected {len(fixes)} fixable tickers.")
-            if args.apply_clean:
-                print("Applying fixes...")
-                scan_and_fix(db_path=target_db, ref_db=args.clean_ref_db, dry_run=False)
-            else:
-                print("Run with --apply-clean to apply the fixes.")
-        else:
-            print("No unit inconsistency detected.")
+        _autoclean(target_db, args)
 
     if args.upload_sftp:
         if not args.sftp_host or not args.sftp_user:
@@ -964,14 +1333,6 @@ def main():
         else:
             upload_db_sftp(target_db, args.sftp_host, args.sftp_user, password=args.sftp_pass, keyfile=args.sftp_key, remote_path=args.sftp_path)
 
-    # If cleaning requested, run and exit
-    if args.clean_price_units:
-        dry_run = not args.apply_clean
-        print("Running price unit scan on price_data.db")
-        print(f"Dry run: {dry_run}. Reference DB: {args.clean_ref_db}")
-        scan_and_fix(db_path=args.db, ref_db=args.clean_ref_db, dry_run=dry_run)
-        return
-
     # Remove tcbs data if requested
     if args.remove_tcbs:
         tickers = None
@@ -990,4 +1351,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        close_cached_connections()
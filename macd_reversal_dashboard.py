@@ -1,15 +1,3 @@
-# Redirect for backward compatibility
-# This file redirects to the renamed macd_reversal_dashboard.py
-
-import os
-import sys
-
-print("Note: ta_dashboard.py has been renamed to macd_reversal_dashboard.py")
-print("Redirecting...")
-
-# Import and run the main dashboard
-import macd_reversal_dashboard
-
 import streamlit as st
 import sqlite3
 import pandas as pd
@@ -19,6 +7,11 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import time
 import os
+import shutil
+import tempfile
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # STARTUP DIAGNOSTICS - Add at very beginning
 print("=" * 50)
@@ -48,18 +41,23 @@ with st.spinner("Initializing dashboard..."):
         st.error(f"Missing dependencies: {', '.join(missing_deps)}")
         st.stop()
 
-# OPTIMIZED: Make build_price_db optional and use environment variables
-try:
-    import build_price_db as bdb
-    DB_PATH = os.getenv("PRICE_DB_PATH", bdb.NEW_DB_PATH)
-    DEFAULT_LOCAL_DB = os.getenv("REF_DB_PATH", bdb.DEFAULT_LOCAL_DB)
-    HAS_BDB = True
-except ImportError:
-    bdb = None
-    DB_PATH = os.getenv("PRICE_DB_PATH", "price_data.db")
-    DEFAULT_LOCAL_DB = os.getenv("REF_DB_PATH", "analysis_results.db")
-    HAS_BDB = False
-    print("Warning: build_price_db module not found. TCBS refresh will be disabled.")
+# OPTIMIZED: build_price_db is only needed by admin actions (TCBS refresh),
+# and importing it costs a noticeable slice of Streamlit cold-start. Defer
+# the import to first use; paths come from the environment with the same
+# defaults build_price_db itself uses.
+DB_PATH = os.getenv("PRICE_DB_PATH", "price_data.db")
+DEFAULT_LOCAL_DB = os.getenv("REF_DB_PATH", "analysis_results.db")
+
+
+@functools.lru_cache(maxsize=None)
+def _bdb():
+    """Lazily import build_price_db; returns None when it isn't bundled."""
+    try:
+        import build_price_db
+        return build_price_db
+    except ImportError:
+        print("Warning: build_price_db module not found. TCBS refresh will be disabled.")
+        return None
 
 # Check if database exists, if not create empty one
 if not os.path.exists(DB_PATH):
@@ -86,6 +84,11 @@ if not os.path.exists(DB_PATH):
     try:
         os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
         conn = sqlite3.connect(DB_PATH)
+        # Streamlit Cloud runs several sessions against this file at once;
+        # WAL + a busy timeout avoid "database is locked" on concurrent reruns.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
         conn.execute("""
             CREATE TABLE IF NOT EXISTS price_data (
                 ticker TEXT,
@@ -110,5 +113,1099 @@ if not os.path.exists(DB_PATH):
         st.error(f"Failed to create database: {e}")
         st.stop()
 
+# Every hot query filters ticker + date range; make sure the composite
+# index exists so those are single B-tree range scans instead of full
+# scans filtered on one column.
+@st.cache_resource
+def _ensure_indexes(db_path=DB_PATH):
+    """Create the hot-query indexes and refresh stats, once per process.
+
+    CREATE INDEX IF NOT EXISTS is cheap but ANALYZE scans every index,
+    and this used to run at top level — i.e. on every rerun of every
+    session, taking a write lock each time. cache_resource limits it to
+    one pass per process.
+    """
+    if not os.path.exists(db_path):
+        return
+    try:
+        _conn = sqlite3.connect(db_path)
+        # WAL is persistent, but a pre-existing DB may still be on the
+        # rollback journal (the bootstrap branch only runs for new
+        # files) — switch here so admin writes don't block the readers.
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_price_ticker_date "
+                      "ON price_data(ticker, date)")
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_price_ticker_date_source "
+                      "ON price_data(ticker, date, source)")
+        _conn.execute("ANALYZE")
+        _conn.commit()
+        _conn.close()
+    except Exception as e:
+        print(f"Warning: could not ensure indexes on {db_path}: {e}")
+
+
+_ensure_indexes()
+
+
 st.set_page_config(page_title="MACD Reversal Dashboard", layout="wide", page_icon="📊")
 st.markdown("#### MACD Histogram Reversal — Overview")
+
+
+# ---------------------------------------------------------------------------
+# Data access
+# ---------------------------------------------------------------------------
+
+# Optional dependency: DuckDB scans the attached SQLite file straight into
+# Arrow-backed columns, skipping pd.read_sql_query's per-row Python tuple
+# materialization on wide selects. sqlite3 remains the fallback.
+try:
+    import duckdb as _duckdb
+except Exception:
+    _duckdb = None
+
+
+# Optional dependency: PyArrow serializes the CSV download at C level —
+# no per-row Python string building and a much smaller peak allocation.
+try:
+    import pyarrow as _pa
+    import pyarrow.csv as _pa_csv
+except Exception:
+    _pa = None
+    _pa_csv = None
+
+
+@st.cache_resource
+def _duck_conn():
+    """In-memory DuckDB with the price DB attached read-only, or None."""
+    if _duckdb is None:
+        return None
+    try:
+        con = _duckdb.connect(':memory:')
+        con.execute("INSTALL sqlite; LOAD sqlite;")
+        con.execute(f"ATTACH '{DB_PATH}' AS p (TYPE sqlite, READ_ONLY)")
+        return con
+    except Exception as e:
+        print(f"Warning: DuckDB unavailable, using sqlite3 readers: {e}")
+        return None
+
+
+def _duck_read(sql, params=()):
+    """Run a query against the attached price DB via DuckDB.
+
+    Returns a DataFrame, or None when DuckDB is absent or the query
+    fails — callers fall back to the sqlite3 path. Only valid for the
+    default DB_PATH (that's what is attached).
+    """
+    con = _duck_conn()
+    if con is None:
+        return None
+    try:
+        # The cached connection is shared across session threads and
+        # execute() parks its pending result on the connection object,
+        # so concurrent queries can swap results. Cursors are cheap and
+        # give each call its own result slot.
+        return con.cursor().execute(sql, list(params)).df()
+    except Exception as e:
+        print(f"Warning: DuckDB query failed ({e}); falling back to sqlite3")
+        return None
+
+
+@st.cache_resource
+def _conn_holder():
+    """Process-wide holder for the per-thread connection map.
+
+    cache_resource keeps the holder (and every connection hanging off
+    it) alive across script reruns and sessions, the Streamlit way of
+    owning a long-lived resource.
+    """
+    return threading.local()
+
+
+def _thread_conn(db_path=DB_PATH):
+    """Per-thread cached read-only connection with the hot-read PRAGMAs set.
+
+    Opening a connection per query pays the file open and a cold page
+    cache every time. One connection per thread keeps SQLite's cache
+    warm across reruns, and mmap turns repeat reads into OS page-cache
+    hits. mode=ro + query_only so the read path can never write;
+    _ensure_indexes switches the database to WAL at startup so these
+    readers don't block the writers.
+    """
+    _tls = _conn_holder()
+    conns = getattr(_tls, 'conns', None)
+    if conns is None:
+        conns = _tls.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True,
+                               check_same_thread=False)
+        conn.executescript(
+            "PRAGMA query_only=1;"
+            "PRAGMA busy_timeout=5000;"
+            "PRAGMA temp_store=MEMORY;"
+            "PRAGMA cache_size=-65536;"
+            "PRAGMA mmap_size=268435456;")
+        conns[db_path] = conn
+    return conn
+
+
+def load_price_range(ticker, start_date, end_date, db_path=DB_PATH):
+    """Load OHLCV rows for a single ticker between start_date and end_date."""
+    params = (ticker, str(start_date), str(end_date))
+    df = None
+    if db_path == DB_PATH:
+        df = _duck_read(
+            "SELECT date, open, high, low, close, volume FROM p.price_data "
+            "WHERE ticker = ? AND date BETWEEN ? AND ? ORDER BY date", params)
+    if df is None:
+        df = pd.read_sql_query(
+            "SELECT date, open, high, low, close, volume FROM price_data "
+            "WHERE ticker = ? AND date BETWEEN ? AND ? ORDER BY date",
+            _thread_conn(db_path), params=params)
+    if not df.empty:
+        # dates are stored as fixed-width YYYY-MM-DD, so the C-level
+        # datetime64 cast beats pd.to_datetime's general string parser
+        df['date'] = np.asarray(df['date'], dtype='datetime64[D]').astype('datetime64[ns]')
+        # float32 holds equity OHLC exactly enough and halves the bytes
+        # the EMA passes (memory-bound) have to stream. Volume can be
+        # NULL in the table (the CSV import writes None for empty
+        # cells), so coerce before the int cast.
+        df[['open', 'high', 'low', 'close']] = \
+            df[['open', 'high', 'low', 'close']].astype(np.float32)
+        df['volume'] = (pd.to_numeric(df['volume'], errors='coerce')
+                        .fillna(0).astype(np.int32))
+    return df
+
+
+def load_prices_bulk(tickers, start_date, end_date, db_path=DB_PATH):
+    """Load OHLCV for many tickers in one query.
+
+    Fetching per ticker costs a connection setup and a query plan each;
+    a single IN (...) range query returns everything in ticker/date order
+    and the date column is parsed once over the whole frame. Callers
+    iterate df.groupby('ticker').
+    """
+    cols = ['ticker', 'date', 'open', 'high', 'low', 'close', 'volume']
+    if not tickers:
+        return pd.DataFrame(columns=cols)
+    placeholders = ",".join("?" for _ in tickers)
+    params = list(tickers) + [str(start_date), str(end_date)]
+    df = None
+    if db_path == DB_PATH:
+        df = _duck_read(
+            f"SELECT {', '.join(cols)} FROM p.price_data "
+            f"WHERE ticker IN ({placeholders}) AND date BETWEEN ? AND ? "
+            f"ORDER BY ticker, date", params)
+    if df is None:
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(cols)} FROM price_data "
+            f"WHERE ticker IN ({placeholders}) AND date BETWEEN ? AND ? "
+            f"ORDER BY ticker, date",
+            _thread_conn(db_path), params=params)
+    if not df.empty:
+        df['date'] = np.asarray(df['date'], dtype='datetime64[D]').astype('datetime64[ns]')
+        df[['open', 'high', 'low', 'close']] = \
+            df[['open', 'high', 'low', 'close']].astype(np.float32)
+        df['volume'] = (pd.to_numeric(df['volume'], errors='coerce')
+                        .fillna(0).astype(np.int32))
+    return df
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_price_range_bulk(tickers, start_date, end_date, db_path=DB_PATH):
+    """Cached (ticker, date)-indexed view over load_prices_bulk.
+
+    One IN query replaces a per-ticker load loop; consumers slice with
+    .xs(ticker) or groupby(level='ticker'). The short TTL just absorbs
+    rerun bursts — candidate sets change with the overview anyway.
+    """
+    df = load_prices_bulk(list(tickers), start_date, end_date, db_path)
+    return df.set_index(['ticker', 'date']).sort_index()
+
+
+def get_all_tickers(db_path=DB_PATH):
+    """Distinct tickers present in the price table."""
+    rows = _thread_conn(db_path).execute(
+        "SELECT DISTINCT ticker FROM price_data "
+        "WHERE ticker IS NOT NULL ORDER BY ticker").fetchall()
+    return [r[0] for r in rows]
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_tickers_with_data(start_date, end_date, db_path=DB_PATH):
+    """Tickers with at least one row in [start_date, end_date].
+
+    Feeding every known ticker to build_overview means loading and then
+    discarding the ones with no rows in the user's range; this pushes
+    that filter into one index-covered GROUP BY instead.
+    """
+    rows = _thread_conn(db_path).execute(
+        "SELECT ticker FROM price_data WHERE date BETWEEN ? AND ? "
+        "GROUP BY ticker ORDER BY ticker",
+        (str(start_date), str(end_date))).fetchall()
+    return [r[0] for r in rows]
+
+
+# ---------------------------------------------------------------------------
+# MACD computation & stage classification
+# ---------------------------------------------------------------------------
+
+# Optional dependency: Numba compiles the EMA recursion to native code.
+# macd_hist runs three EMAs per ticker per timeframe, making it the hottest
+# compute in the overview build; pandas ewm falls back in when absent.
+try:
+    from numba import njit
+except Exception:
+    njit = None
+
+# Optional dependency: SciPy's lfilter runs the same first-order recursion
+# in C — the middle rung of the EMA fallback ladder (numba > scipy > pandas).
+try:
+    from scipy.signal import lfilter as _lfilter
+except Exception:
+    _lfilter = None
+
+# Optional dependency: TA-Lib's C MACD. It seeds with an SMA (NaN warmup)
+# rather than ewm(adjust=False), so it only takes over when the Numba
+# kernel — which matches the fused overview kernel bar for bar — is absent.
+try:
+    import talib as _talib
+except Exception:
+    _talib = None
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _ema_nb(x, alpha):
+        out = np.empty_like(x)
+        out[0] = x[0]
+        for i in range(1, len(x)):
+            out[i] = alpha * x[i] + (1.0 - alpha) * out[i - 1]
+        return out
+
+    @njit(cache=True, nogil=True)
+    def _fused_hist_nb(c, wk, mo, fast, slow, signal):
+        """Daily/weekly/monthly MACD histograms in one scan over close.
+
+        Weekly and monthly bars are just the close at each week/month
+        boundary, so instead of resampling into new frames and running
+        nine EMA passes, this walks the daily closes once, keeps running
+        (fast, slow, signal) EMA state per timeframe, and flushes the
+        weekly/monthly state whenever the week/month id changes.
+        """
+        af = 2.0 / (fast + 1)
+        aslow = 2.0 / (slow + 1)
+        asig = 2.0 / (signal + 1)
+        n = c.size
+        # outputs inherit the input dtype so float32 closes stay float32
+        # through the whole pipeline (the scalar state runs in float64,
+        # which costs nothing and keeps the recurrence accurate)
+        hist_d = np.empty_like(c)
+        hist_w = np.empty_like(c)
+        hist_m = np.empty_like(c)
+        fd = float(c[0])
+        sd = fd
+        gd = 0.0
+        hist_d[0] = 0.0
+        nw = 0
+        fw = sw = gw = 0.0
+        nm = 0
+        fm = sm = gm = 0.0
+        for i in range(1, n):
+            x = float(c[i])
+            fd = af * x + (1.0 - af) * fd
+            sd = aslow * x + (1.0 - aslow) * sd
+            line = fd - sd
+            gd = asig * line + (1.0 - asig) * gd
+            hist_d[i] = line - gd
+            xb = float(c[i - 1])
+            if wk[i] != wk[i - 1]:
+                if nw == 0:
+                    fw = sw = xb
+                    gw = 0.0
+                    hist_w[0] = 0.0
+                else:
+                    fw = af * xb + (1.0 - af) * fw
+                    sw = aslow * xb + (1.0 - aslow) * sw
+                    line_w = fw - sw
+                    gw = asig * line_w + (1.0 - asig) * gw
+                    hist_w[nw] = line_w - gw
+                nw += 1
+            if mo[i] != mo[i - 1]:
+                if nm == 0:
+                    fm = sm = xb
+                    gm = 0.0
+                    hist_m[0] = 0.0
+                else:
+                    fm = af * xb + (1.0 - af) * fm
+                    sm = aslow * xb + (1.0 - aslow) * sm
+                    line_m = fm - sm
+                    gm = asig * line_m + (1.0 - asig) * gm
+                    hist_m[nm] = line_m - gm
+                nm += 1
+        # the last (possibly partial) week and month still form a bar
+        xb = float(c[n - 1])
+        if nw == 0:
+            hist_w[0] = 0.0
+        else:
+            fw = af * xb + (1.0 - af) * fw
+            sw = aslow * xb + (1.0 - aslow) * sw
+            line_w = fw - sw
+            gw = asig * line_w + (1.0 - asig) * gw
+            hist_w[nw] = line_w - gw
+        nw += 1
+        if nm == 0:
+            hist_m[0] = 0.0
+        else:
+            fm = af * xb + (1.0 - af) * fm
+            sm = aslow * xb + (1.0 - aslow) * sm
+            line_m = fm - sm
+            gm = asig * line_m + (1.0 - asig) * gm
+            hist_m[nm] = line_m - gm
+        nm += 1
+        return hist_d, hist_w[:nw], hist_m[:nm]
+
+    # Warm the JIT once at import so the first rerun doesn't pay compile
+    # time. Cover both loader dtypes AND the read-only signatures:
+    # pandas .to_numpy() hands out read-only views under copy-on-write,
+    # numba specializes on writability, and a first-call compile inside
+    # an overview worker thread deadlocks against the module import lock
+    # this script holds while its body runs.
+    _warm_wk = np.arange(32, dtype=np.int64) // 7
+    _warm_mo = np.arange(32, dtype=np.int64) // 30
+    _warm_wk_ro = _warm_wk.copy()
+    _warm_wk_ro.setflags(write=False)
+    _warm_mo_ro = _warm_mo.copy()
+    _warm_mo_ro.setflags(write=False)
+    for _dt in (np.float64, np.float32):
+        _warm_x = np.zeros(32, dtype=_dt)
+        _warm_x_ro = _warm_x.copy()
+        _warm_x_ro.setflags(write=False)
+        for _x in (_warm_x, _warm_x_ro):
+            _ema_nb(_x, 0.5)
+            _fused_hist_nb(_x, _warm_wk, _warm_mo, 12, 26, 9)
+            _fused_hist_nb(_x, _warm_wk_ro, _warm_mo_ro, 12, 26, 9)
+else:
+    _fused_hist_nb = None
+
+
+def _ema(close, span):
+    """EMA matching ewm(span=..., adjust=False).mean(), as an ndarray.
+
+    Accepts a Series or ndarray. Keeps float32 input in float32 — the
+    loaders downcast at read time and widening here would give the
+    bandwidth saving straight back.
+    """
+    x = close.to_numpy() if hasattr(close, 'to_numpy') else np.asarray(close)
+    x = np.ascontiguousarray(x)
+    if not np.issubdtype(x.dtype, np.floating):
+        x = x.astype(np.float64)
+    alpha = 2.0 / (span + 1)
+    if njit is not None and x.size:
+        return _ema_nb(x, alpha)
+    if _lfilter is not None and x.size:
+        # first-order IIR: y[i] = alpha*x[i] + (1-alpha)*y[i-1], seeded so
+        # y[0] == x[0]; matches ewm(adjust=False) to ~1e-13
+        return _lfilter([alpha], [1.0, -(1.0 - alpha)], x,
+                        zi=[(1.0 - alpha) * x[0]])[0]
+    return pd.Series(x).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def macd_hist(close, fast=12, slow=26, signal=9):
+    """Return (macd line, signal line, histogram) for a close series.
+
+    The whole computation stays on raw arrays (Numba kernel when
+    available) — no intermediate Series between the EMA passes. Series
+    input comes back as Series on the same index; ndarray input comes
+    back as ndarrays.
+    """
+    x = close.to_numpy() if hasattr(close, 'to_numpy') else np.asarray(close)
+    if njit is None and _talib is not None and x.size:
+        line, sig, hist = _talib.MACD(
+            np.ascontiguousarray(x, dtype=np.float64),
+            fastperiod=fast, slowperiod=slow, signalperiod=signal)
+    else:
+        line = _ema(x, fast) - _ema(x, slow)
+        sig = _ema(line, signal)
+        hist = line - sig
+    index = getattr(close, 'index', None)
+    if index is None:
+        return line, sig, hist
+    return (pd.Series(line, index=index), pd.Series(sig, index=index),
+            pd.Series(hist, index=index))
+
+
+def detect_stage(hist, slope_window=5):
+    """Classify a MACD histogram series into one of six reversal stages.
+
+    Positive histogram: fresh cross-up = confirmed trough, then rising /
+    peaking by slope. Negative histogram mirrors with confirmed peak /
+    falling / troughing. The numeric prefix keeps the strings sortable.
+    """
+    values = hist.to_numpy() if hasattr(hist, 'to_numpy') else np.asarray(hist)
+    if not np.issubdtype(values.dtype, np.floating):
+        values = values.astype(np.float64)
+    values = values[~np.isnan(values)]
+    if values.size < 3:
+        return "N/A"
+    # last sign flip via one diff pass; a least-squares polyfit over a
+    # handful of points is overkill for a slope whose sign is all we use,
+    # so take the endpoint slope of the window instead
+    signs = (values >= 0).astype(np.int8)
+    flips = np.flatnonzero(np.diff(signs) != 0)
+    last_cross_idx = flips[-1] + 1 if flips.size else 0
+    bars_since_cross = values.size - last_cross_idx
+    window = values[-min(slope_window, values.size):]
+    slope = (window[-1] - window[0]) / (len(window) - 1)
+    if values[-1] >= 0:
+        if bars_since_cross <= 3:
+            return "1. Confirmed Trough"
+        if slope > 0:
+            return "2. Rising"
+        return "3. Peaking"
+    if bars_since_cross <= 3:
+        return "4. Confirmed Peak"
+    if slope < 0:
+        return "5. Falling"
+    return "6. Troughing"
+
+
+# Stage strings carry their rank as a "N. " prefix, so one char indexes
+# straight into the score table — no substring scans per call.
+_SCORE = {'1': 2, '2': 3, '3': 1, '4': -2, '5': -3, '6': -1}
+_TREND_CODE = {str(n): n for n in range(1, 7)}
+
+
+def stage_score(stage):
+    """Score a stage string: bullish stages positive, bearish negative."""
+    return _SCORE.get(stage[:1], 0)
+
+
+FULL_TRADING_MINUTES = 255  # HOSE: 09:00-11:30 + 13:00-14:45
+
+
+def elapsed_trading_minutes(now=None):
+    """Minutes of the HOSE session elapsed so far today (caps at full day).
+
+    Pure minute arithmetic on the clock time — the session breakpoints
+    (09:00/11:30/13:00/14:45) are 540/690/780/885 minutes past midnight,
+    so no strptime/combine datetime objects are needed per call.
+    """
+    now = now or datetime.now()
+    t = now.hour * 60 + now.minute
+    if t < 540:
+        return 0
+    if t <= 690:
+        return t - 540
+    if t < 780:
+        return 150
+    if t <= 885:
+        return 150 + (t - 780)
+    return FULL_TRADING_MINUTES
+
+
+RESAMPLE_AGG = {'open': 'first', 'high': 'max', 'low': 'min',
+                'close': 'last', 'volume': 'sum'}
+
+
+def _week_labels(dates):
+    """Mon–Sun week ids for a datetime64 array.
+
+    datetime64[W] buckets are anchored on the Unix epoch, a Thursday, so
+    a bare cast runs weeks Thu–Wed and splits each Mon–Fri trading week
+    across two bars. Shifting three days first moves the boundary to
+    Monday, matching resample('W').
+    """
+    return (dates + np.timedelta64(3, 'D')).astype('datetime64[W]')
+
+
+def _resample_ohlcv(dates, o, h, l, c, v, freq):
+    """OHLCV bars per calendar week ('W') or month ('M') via reduceat.
+
+    resample('W'/'M') rebuilds a DatetimeIndex and materializes a new
+    frame for every ticker; casting the datetime64 array to week/month
+    precision gives segment labels directly, and reduceat over the
+    segment starts aggregates each column in one pass.
+    """
+    if freq == 'W':
+        labels = _week_labels(dates)
+    else:
+        labels = dates.astype('datetime64[M]')
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], labels.size] - 1
+    idx = labels[starts]
+    if freq == 'W':
+        # label each bar by its Monday (undo the three-day shift)
+        idx = idx.astype('datetime64[D]') - np.timedelta64(3, 'D')
+    return pd.DataFrame({
+        'open': o[starts],
+        'high': np.maximum.reduceat(h, starts),
+        'low': np.minimum.reduceat(l, starts),
+        'close': c[ends],
+        'volume': np.add.reduceat(v, starts),
+    }, index=idx)
+
+
+OVERVIEW_WORKERS = 8
+
+
+def _overview_row(t, df, elapsed):
+    """Compute one overview row for ticker t, or None if too little data.
+
+    Pure NumPy/pandas work on an already-loaded group slice — no I/O —
+    so it can run on a worker thread (the EMA kernels release the GIL).
+    """
+    if len(df) < 30:
+        return None
+    close = df['close']
+    dates64 = df['date'].to_numpy()
+    c = close.to_numpy()
+    if _fused_hist_nb is not None:
+        # fused path: one linear scan computes all three timeframes —
+        # no weekly/monthly frames, no separate EMA passes per bar size
+        wk = _week_labels(dates64).astype(np.int64)
+        mo = dates64.astype('datetime64[M]').astype(np.int64)
+        hist_d, hist_w, hist_m = _fused_hist_nb(c, wk, mo, 12, 26, 9)
+    else:
+        # only the close feeds the MACD, and the weekly/monthly close is
+        # just the daily close at each bar's last session — index into
+        # the daily array instead of building resampled OHLCV frames
+        _, _, hist_d = macd_hist(close)
+        wk = _week_labels(dates64)
+        mo = dates64.astype('datetime64[M]')
+        w_ends = np.r_[np.flatnonzero(wk[1:] != wk[:-1]), c.size - 1]
+        m_ends = np.r_[np.flatnonzero(mo[1:] != mo[:-1]), c.size - 1]
+        _, _, hist_w = macd_hist(pd.Series(c[w_ends]))
+        _, _, hist_m = macd_hist(pd.Series(c[m_ends]))
+        hist_d = hist_d.to_numpy()
+        hist_w = hist_w.to_numpy()
+        hist_m = hist_m.to_numpy()
+
+    stage_d = detect_stage(hist_d)
+    stage_w = detect_stage(hist_w)
+    stage_m = detect_stage(hist_m)
+    score = stage_score(stage_d) + 0.5 * stage_score(stage_w) + 0.25 * stage_score(stage_m)
+
+    # volume vs 20-day average, scaling today's partial session up.
+    # df is date-sorted, so the prior 20 sessions are just the slice
+    # before the last element — no boolean mask or filtered frame.
+    vols = df['volume'].to_numpy(dtype=np.float64)
+    latest_vol = vols[-1]
+    if vols.size >= 21:
+        avg_vol = vols[-21:-1].mean()
+    elif vols.size > 1:
+        avg_vol = vols[:-1].mean()
+    else:
+        avg_vol = 0.0
+    if avg_vol and avg_vol > 0:
+        if 0 < elapsed < FULL_TRADING_MINUTES:
+            adj_vol = latest_vol * (FULL_TRADING_MINUTES / elapsed)
+        else:
+            adj_vol = latest_vol
+        vol_ratio = adj_vol / avg_vol
+    else:
+        vol_ratio = 0.0
+
+    return {
+        'Ticker': t,
+        'Close': float(close.iloc[-1]),
+        'Score': score,
+        'Trend (Daily)': stage_d,
+        'Trend (Weekly)': stage_w,
+        'Trend (Monthly)': stage_m,
+        'MACD_Hist_Daily': float(hist_d[-1]),
+        'MACD_Hist_Weekly': float(hist_w[-1]),
+        'MACD_Hist_Monthly': float(hist_m[-1]),
+        'Vol/AvgVol': float(vol_ratio),
+    }
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def build_overview(tickers, start_date, end_date, max_rows=200):
+    """One row per ticker: close, score and MACD stage across three timeframes.
+
+    All price history comes from a single bulk query up front; the
+    per-ticker compute fans out over a thread pool (NumPy/Numba release
+    the GIL for the heavy parts). Cached for 5 minutes keyed on
+    (tickers tuple, date range, max_rows), so reruns triggered by
+    unrelated widgets skip the whole rebuild.
+    """
+    prices = load_prices_bulk(list(tickers)[:max_rows], start_date, end_date)
+    if prices.empty:
+        return pd.DataFrame()
+    elapsed = elapsed_trading_minutes()
+    groups = list(prices.groupby('ticker', sort=False))
+    with ThreadPoolExecutor(max_workers=OVERVIEW_WORKERS) as ex:
+        results = list(ex.map(lambda tg: _overview_row(tg[0], tg[1], elapsed), groups))
+    rows = [r for r in results if r is not None]
+    df_out = pd.DataFrame(rows)
+    if df_out.empty:
+        return df_out
+    # one vectorized round over the column beats int(np.round(...)) per
+    # row; display formatting happens in the Styler, not in the data
+    df_out['Score'] = np.round(df_out['Score']).astype(np.int8)
+    # MACD_Hist_Daily is still a float column here, so it can be the
+    # secondary sort key directly — no helper column to add and drop
+    df_out = (df_out.sort_values(['Trend (Daily)', 'MACD_Hist_Daily'],
+                                 ascending=[True, False], kind='stable')
+              .reset_index(drop=True))
+    return df_out
+
+
+# ---------------------------------------------------------------------------
+# Table styling
+# ---------------------------------------------------------------------------
+
+def style_vol_ratio(col):
+    """CSS for the whole Vol/AvgVol column in one vectorized pass."""
+    ratio = col.to_numpy(dtype=np.float64)
+    return np.select(
+        [ratio >= 1.5, ratio >= 1.2, (ratio > 0) & (ratio <= 0.5)],
+        ['background-color: #66bb6a; color: white',
+         'background-color: #a5d6a7',
+         'background-color: #ef9a9a'],
+        default='')
+
+
+_TREND_CSS = {
+    '1': 'color: #2e7d32; font-weight: bold',
+    '2': 'color: #2e7d32; font-weight: bold',
+    '4': 'color: #c62828; font-weight: bold',
+    '5': 'color: #c62828; font-weight: bold',
+}
+
+_STAGE_CSS = {
+    '1': 'background-color: #2e7d32; color: white',
+    '2': 'background-color: #a5d6a7',
+    '3': 'background-color: #fff59d',
+    '4': 'background-color: #c62828; color: white',
+    '5': 'background-color: #ef9a9a',
+    '6': 'background-color: #ffcc80',
+}
+
+
+def build_overview_styles(df, columns):
+    """The complete overview CSS frame in one shot.
+
+    Everything the table colors — score background, MACD trend colors,
+    stage cells, volume-ratio buckets — comes from column-wise
+    operations assembled into one frame, handed to the Styler in a
+    single axis=None apply. No per-row or per-subset passes remain.
+    """
+    score = df['Score'].to_numpy()
+    score_css = np.select(
+        [score >= 4, score >= 2, score <= -4, score <= -2],
+        ['background-color: #2e7d32; color: white',
+         'background-color: #a5d6a7',
+         'background-color: #c62828; color: white',
+         'background-color: #ef9a9a'],
+        default='')
+    style_df = pd.DataFrame('', index=df.index, columns=columns)
+    style_df['Ticker'] = score_css
+    style_df['Close'] = score_css
+    for macd_col, trend_col in (('MACD_Hist_Daily', 'Trend (Daily)'),
+                                ('MACD_Hist_Weekly', 'Trend (Weekly)'),
+                                ('MACD_Hist_Monthly', 'Trend (Monthly)')):
+        style_df[macd_col] = (df[trend_col].str[:1].map(_TREND_CSS)
+                              .fillna('').to_numpy())
+    for trend_col in ('Trend (Daily)', 'Trend (Weekly)', 'Trend (Monthly)'):
+        style_df[trend_col] = style_stage_column(df[trend_col])
+    style_df['Vol/AvgVol'] = style_vol_ratio(df['Vol/AvgVol'])
+    return style_df
+
+
+def style_stage_column(col):
+    """CSS for a Trend column — one mapped pass instead of per-cell calls."""
+    return col.astype(str).str[:1].map(_STAGE_CSS).fillna('').to_numpy()
+
+
+# ---------------------------------------------------------------------------
+# Overview page
+# ---------------------------------------------------------------------------
+
+all_tickers = get_all_tickers()
+
+ctrl_a, ctrl_b, ctrl_c = st.columns(3)
+with ctrl_a:
+    lookback = st.selectbox("Lookback", [90, 180, 365, 730], index=2,
+                            format_func=lambda d: f"{d} days")
+with ctrl_b:
+    max_rows = st.number_input("Max tickers", min_value=10, max_value=1000,
+                               value=200, step=10)
+with ctrl_c:
+    if st.button("🔄 Clear cache"):
+        st.cache_data.clear()
+
+end_date = datetime.now().date()
+start_date = end_date - timedelta(days=int(lookback))
+
+if not all_tickers:
+    st.info("No tickers in the database yet — add data via the Admin panel.")
+    st.stop()
+
+tickers_in_range = get_tickers_with_data(start_date, end_date)
+df_over = build_overview(tuple(tickers_in_range), start_date, end_date, max_rows=int(max_rows))
+
+display_cols = ['Ticker', 'Close', 'Score',
+                'Trend (Daily)', 'Trend (Weekly)', 'Trend (Monthly)',
+                'MACD_Hist_Daily', 'MACD_Hist_Weekly', 'MACD_Hist_Monthly',
+                'Vol/AvgVol']
+
+if df_over.empty:
+    st.info("No price data in the selected range.")
+else:
+    overview_styles = build_overview_styles(df_over, display_cols)
+    styled = df_over[display_cols].style
+    styled = styled.apply(lambda _: overview_styles, axis=None)
+    styled = styled.format({'Close': '{:.1f}',
+                            'Vol/AvgVol': '{:.2f}x',
+                            'MACD_Hist_Daily': '{:.3f}',
+                            'MACD_Hist_Weekly': '{:.3f}',
+                            'MACD_Hist_Monthly': '{:.3f}'})
+    st.dataframe(styled, use_container_width=True, height=600)
+
+
+# ---------------------------------------------------------------------------
+# Quick commentary
+# ---------------------------------------------------------------------------
+
+NEAR_CROSS_BAND = 0.5  # |daily histogram| below this counts as "near zero"
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _latest_bar_date(db_path=DB_PATH):
+    """Most recent bar date in the DB — the natural cache key for any
+    result that only changes when a new bar lands."""
+    row = _thread_conn(db_path).execute(
+        "SELECT MAX(date) FROM price_data").fetchone()
+    return row[0] if row else None
+
+
+@st.cache_data(show_spinner=False)
+def estimate_days_to_cross(tickers, end_date, latest_bar):
+    """Estimated sessions until each ticker's daily histogram crosses zero.
+
+    One IN-query pulls the recent closes for every candidate at once and
+    MACD runs once per group; the velocity is the mean delta over the
+    last five histogram bars. No per-ticker round trips to SQLite.
+
+    latest_bar keys the cache: a wall-clock TTL would redo all the I/O
+    every minute even though nothing changes until a new bar arrives.
+    """
+    cols = ['Ticker', 'hist', 'velocity', 'days']
+    if not tickers:
+        return pd.DataFrame(columns=cols)
+    start = end_date - timedelta(days=120)
+    px = load_price_range_bulk(tuple(tickers), start, end_date)
+    if px.empty:
+        return pd.DataFrame(columns=cols)
+    out = []
+    for t, g in px.groupby(level='ticker', sort=False):
+        _, _, hist = macd_hist(g['close'])
+        h = hist.to_numpy()
+        if h.size < 6:
+            continue
+        velocity = float(np.diff(h[-5:]).mean())
+        days = abs(float(h[-1]) / velocity) if velocity else float('inf')
+        out.append((t, float(h[-1]), velocity, days))
+    return pd.DataFrame(out, columns=cols)
+
+
+st.markdown("##### 💬 Quick Commentary")
+if df_over.empty:
+    st.caption("No data to comment on.")
+else:
+    df_analysis = df_over.copy()
+    # Vol/AvgVol and MACD_Hist_Daily arrive numeric from build_overview
+    # now (display formatting lives in the Styler), so no string
+    # round-trip back to float here. Categorize the trend once via its
+    # numeric prefix; the class masks become int comparisons instead of
+    # repeated str.contains scans.
+    df_analysis['trend_code'] = (df_analysis['Trend (Daily)'].str[:1]
+                                 .map(_TREND_CODE).fillna(0).astype('int8'))
+
+    bottoming = df_analysis[df_analysis['trend_code'].isin([5, 6])]
+    topping = df_analysis[df_analysis['trend_code'].isin([2, 3])]
+    near_cross_up_candidates = bottoming[bottoming['MACD_Hist_Daily'] > -NEAR_CROSS_BAND]
+    near_cross_down_candidates = topping[topping['MACD_Hist_Daily'] < NEAR_CROSS_BAND]
+
+    if near_cross_up_candidates.empty and near_cross_down_candidates.empty:
+        # quiet day: nothing near a cross, so skip the volume filter and
+        # the whole velocity pipeline instead of running it over nothing
+        st.caption("No tickers near a MACD cross today.")
+    else:
+        vol_filter = st.checkbox("Only candidates with above-average volume", value=False)
+        if vol_filter:
+            # the candidate frames are slices of df_analysis, so the ratio
+            # is already a column — one mask, no per-ticker frame scans
+            near_cross_up_candidates = \
+                near_cross_up_candidates[near_cross_up_candidates['Vol/AvgVol'] >= 1.2]
+            near_cross_down_candidates = \
+                near_cross_down_candidates[near_cross_down_candidates['Vol/AvgVol'] >= 1.2]
+
+        cand_tickers = tuple(pd.concat([near_cross_up_candidates,
+                                        near_cross_down_candidates])['Ticker'].unique())
+        vel = estimate_days_to_cross(cand_tickers, end_date, _latest_bar_date())
+        # plain dicts beat .loc per candidate, and zipping the two column
+        # arrays avoids iterrows boxing every row into a Series
+        velocity_map = dict(zip(vel['Ticker'], vel['velocity'])) if not vel.empty else {}
+        days_map = dict(zip(vel['Ticker'], vel['days'])) if not vel.empty else {}
+
+        up_lines = []
+        for t, hval in zip(near_cross_up_candidates['Ticker'].to_numpy(),
+                           near_cross_up_candidates['MACD_Hist_Daily'].to_numpy()):
+            if velocity_map.get(t, 0) > 0:
+                d = days_map[t]
+                if d <= 10:
+                    up_lines.append(f"**{t}** — hist {hval:.3f}, "
+                                    f"≈{d:.0f} sessions to cross up")
+        down_lines = []
+        for t, hval in zip(near_cross_down_candidates['Ticker'].to_numpy(),
+                           near_cross_down_candidates['MACD_Hist_Daily'].to_numpy()):
+            if velocity_map.get(t, 0) < 0:
+                d = days_map[t]
+                if d <= 10:
+                    down_lines.append(f"**{t}** — hist {hval:.3f}, "
+                                      f"≈{d:.0f} sessions to cross down")
+
+        com_up, com_down = st.columns(2)
+        with com_up:
+            st.markdown("**Approaching bullish cross**")
+            st.markdown("\n".join(f"- {l}" for l in up_lines) if up_lines else "None")
+        with com_down:
+            st.markdown("**Approaching bearish cross**")
+            st.markdown("\n".join(f"- {l}" for l in down_lines) if down_lines else "None")
+
+
+# ---------------------------------------------------------------------------
+# Detailed view
+# ---------------------------------------------------------------------------
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _compute_macd_triple(ticker, start, end):
+    """Daily frame plus weekly/monthly bars and MACD histograms for one ticker.
+
+    Cached so the drilldown chart and any other consumer of the same
+    (ticker, range) share one load + compute instead of redoing the
+    resample/EMA work per widget.
+    """
+    df = load_price_range(ticker, start, end)
+    if df.empty:
+        return None
+    close = df['close']
+    _, _, hist_d = macd_hist(close)
+    dates64 = df['date'].to_numpy()
+    o = df['open'].to_numpy()
+    h = df['high'].to_numpy()
+    l = df['low'].to_numpy()
+    c = close.to_numpy()
+    # volume stays float64: weekly sums can overflow int32
+    v = df['volume'].to_numpy(dtype=np.float64)
+    # weekly bars are plotted, so they need the full OHLCV aggregation;
+    # the monthly histogram only needs the month-end closes
+    df_w = _resample_ohlcv(dates64, o, h, l, c, v, 'W')
+    _, _, hist_w = macd_hist(df_w['close'])
+    mo = dates64.astype('datetime64[M]')
+    m_ends = np.r_[np.flatnonzero(mo[1:] != mo[:-1]), c.size - 1]
+    _, _, hist_m = macd_hist(c[m_ends])
+    return (df, hist_d.to_numpy(), df_w, hist_w.to_numpy(), hist_m)
+
+
+def plot_multi_tf_macd(ticker, start, end):
+    """Price + daily/weekly MACD histogram chart for the detail view."""
+    triple = _compute_macd_triple(ticker, start, end)
+    if triple is None:
+        return None
+    df, hist_d, df_w, hist_w, _hist_m = triple
+    fig = make_subplots(
+        rows=3, cols=1, shared_xaxes=False, vertical_spacing=0.08,
+        subplot_titles=(f"{ticker} — Close", "MACD Histogram (Daily)",
+                        "MACD Histogram (Weekly)"))
+    fig.add_trace(go.Scatter(x=df['date'], y=df['close'], mode='lines',
+                             name='Close'), row=1, col=1)
+    # np.where yields the color array in one vectorized pass — the
+    # per-bar list comprehension was the slow part of the figure build
+    colors_d = np.where(hist_d >= 0, '#1f77b4', '#ff7f0e')
+    fig.add_trace(go.Bar(x=df['date'], y=hist_d, marker_color=colors_d,
+                         name='Hist D'), row=2, col=1)
+    colors_w = np.where(hist_w >= 0, '#1f77b4', '#ff7f0e')
+    fig.add_trace(go.Bar(x=df_w.index, y=hist_w, marker_color=colors_w,
+                         name='Hist W'), row=3, col=1)
+    # one shape per subplot instead of a Scatter serializing N zeros
+    fig.add_hline(y=0, line=dict(color='black', width=1), row=2, col=1)
+    fig.add_hline(y=0, line=dict(color='black', width=1), row=3, col=1)
+    fig.update_layout(height=720, showlegend=False,
+                      margin=dict(l=40, r=20, t=50, b=30))
+    return fig
+
+
+def _back_to_overview():
+    # runs as an on_click callback, i.e. before the natural rerun —
+    # the next render already shows the overview, no explicit st.rerun
+    # (which would replay the whole script a second time)
+    st.session_state.selected_ticker = None
+    st.session_state.detail_select = "(none)"
+
+
+st.markdown("---")
+_detail_options = ["(none)"] + (df_over['Ticker'].tolist() if not df_over.empty else [])
+sel = st.selectbox("Detailed view", _detail_options, key='detail_select')
+if sel != "(none)":
+    st.session_state.selected_ticker = sel
+
+ticker = st.session_state.get('selected_ticker')
+if ticker:
+    st.markdown(f"### {ticker} — Detailed view")
+    # one load feeds both columns; each used to issue its own identical
+    # query (and the chart path is cached on top of this anyway)
+    df = load_price_range(ticker, start_date, end_date)
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        if df.empty:
+            st.info("No data for this ticker in the selected range.")
+        else:
+            last = df.iloc[-1]
+            st.metric("Close", f"{last['close']:.1f}")
+            st.metric("Volume", f"{int(last['volume']):,}")
+            st.caption(f"Last bar: {last['date'].date()}")
+            st.dataframe(df.tail(10).iloc[::-1], use_container_width=True)
+    with col2:
+        if not df.empty:
+            fig = plot_multi_tf_macd(ticker, start_date, end_date)
+            if fig is not None:
+                st.plotly_chart(fig, use_container_width=True)
+
+    # the full-history scan only runs when the user actually asks for it
+    if st.button("Prepare full-history CSV"):
+        df_full = load_price_range(ticker, "2000-01-01", end_date)
+        if df_full.empty:
+            st.info("No stored history for this ticker.")
+        else:
+            if _pa is not None:
+                buf = _pa.BufferOutputStream()
+                _pa_csv.write_csv(
+                    _pa.Table.from_pandas(df_full, preserve_index=False), buf)
+                csv_bytes = bytes(buf.getvalue())
+            else:
+                csv_bytes = df_full.to_csv(index=False).encode('utf-8')
+            st.download_button("⬇️ Download full data CSV", data=csv_bytes,
+                               file_name=f"{ticker}_full.csv", mime="text/csv")
+
+    st.button("← Back to Overview", on_click=_back_to_overview)
+
+
+# ---------------------------------------------------------------------------
+# Admin panel
+# ---------------------------------------------------------------------------
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _ticker_preview(ticker, date_str, db_path=DB_PATH):
+    """Last five stored bars for one ticker (parametrized, not inlined).
+
+    date_str keys the cache to the current day: the preview's contents
+    only change when new bars land, so reruns within the day are free.
+    """
+    return pd.read_sql_query(
+        "SELECT date, open, high, low, close, volume, source "
+        "FROM price_data WHERE ticker = ? ORDER BY date DESC LIMIT 5",
+        _thread_conn(db_path), params=(ticker,))
+
+
+with st.expander("🔧 Admin: Manage Tickers & Data"):
+    import ticker_manager as tm
+
+    adm_a, adm_b = st.columns(2)
+    with adm_a:
+        new_ticker = st.text_input("Add ticker", max_chars=10)
+        if st.button("Add") and new_ticker:
+            tm.add_ticker(new_ticker.strip().upper(), db_path=DB_PATH)
+            st.cache_data.clear()
+            st.success(f"Added {new_ticker.strip().upper()}")
+    with adm_b:
+        rm_ticker = st.text_input("Remove ticker", max_chars=10)
+        if st.button("Remove") and rm_ticker:
+            tm.remove_ticker(rm_ticker.strip().upper(), db_path=DB_PATH, confirm=True)
+            st.cache_data.clear()
+            st.success(f"Removed {rm_ticker.strip().upper()}")
+
+    st.markdown("**Data preview**")
+    preview_ticker = st.text_input("Preview ticker", value="GMD", max_chars=10)
+    if preview_ticker:
+        st.dataframe(_ticker_preview(preview_ticker.strip().upper(),
+                                     str(datetime.now().date())),
+                     use_container_width=True)
+
+    st.markdown("**TCBS refresh**")
+    refresh_days = st.number_input("Days of history", min_value=30,
+                                   max_value=3650, value=365, step=30)
+    if st.button("Force refresh ALL tickers"):
+        bdb = _bdb()
+        if bdb is None:
+            st.error("build_price_db is not bundled — TCBS refresh unavailable.")
+        else:
+            tickers = get_all_tickers()
+            prog = st.progress(0.0)
+            frames = []
+            scale_cache = bdb.load_all_saved_scales(DB_PATH)
+            for i, t in enumerate(tickers):
+                try:
+                    df_t = bdb.fetch_and_scale(t, days=int(refresh_days),
+                                               db_path=DB_PATH,
+                                               scale_cache=scale_cache)
+                    if df_t is not None and not df_t.empty:
+                        frames.append(pd.DataFrame({
+                            'ticker': t,
+                            'date': df_t['tradingDate'].dt.strftime('%Y-%m-%d'),
+                            'open': df_t['open'], 'high': df_t['high'],
+                            'low': df_t['low'], 'close': df_t['close'],
+                            'volume': df_t['volume'],
+                        }))
+                except Exception as e:
+                    print(f"[admin] refresh {t} failed: {e}")
+                prog.progress((i + 1) / len(tickers))
+            if frames:
+                # one write transaction for the whole batch — the old
+                # per-ticker delete + upsert paid a commit (and fsync)
+                # per ticker
+                all_new = pd.concat(frames, ignore_index=True)
+                wconn = sqlite3.connect(DB_PATH)
+                try:
+                    with wconn:
+                        wconn.executemany(
+                            "DELETE FROM price_data "
+                            "WHERE ticker = ? AND source = 'tcbs'",
+                            [(f['ticker'].iloc[0],) for f in frames])
+                        wconn.executemany(
+                            "INSERT OR REPLACE INTO price_data "
+                            "(ticker, date, open, high, low, close, volume, source) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, 'tcbs')",
+                            list(all_new[['ticker', 'date', 'open', 'high',
+                                          'low', 'close', 'volume']]
+                                 .itertuples(index=False, name=None)))
+                finally:
+                    wconn.close()
+                st.cache_data.clear()
+                st.success(f"Refreshed {len(frames)} tickers "
+                           f"({len(all_new)} rows) in one transaction.")
+            else:
+                st.warning("No data fetched from TCBS.")
+
+    st.markdown("**Bulk import CSV**")
+    uploaded_file = st.file_uploader(
+        "CSV with ticker, date, open, high, low, close, volume",
+        type=["csv", "txt"])
+    if uploaded_file is not None and st.button("Import CSV"):
+        with tempfile.NamedTemporaryFile(mode="wb", suffix=".csv",
+                                         delete=False) as tmp:
+            # stream in 1 MiB chunks — getvalue() would hold the whole
+            # upload in memory a second time just to write it out
+            shutil.copyfileobj(uploaded_file, tmp, length=1024 * 1024)
+            tmp_path = tmp.name
+        try:
+            inserted, errors = tm.import_tickers_from_csv(tmp_path, db_path=DB_PATH)
+        finally:
+            os.unlink(tmp_path)
+        st.cache_data.clear()
+        if errors:
+            st.warning(f"Imported {inserted} rows with {errors} errors.")
+        else:
+            st.success(f"Imported {inserted} rows.")